@@ -1,18 +1,36 @@
 from django.urls import path
 from team.views import (
     get_members,
+    get_members_by_categories,
     apply,
     get_applications,
+    export_applications,
+    get_application_statistics,
     UpdateMemberImageView,
+    get_image_job,
     MemberCategoryView,
+    get_projects_descriptions,
 )
 from api.views import health_check
 
 urlpatterns = [
     path("members-by-type/", get_members, name="Members_getter"),
+    path(
+        "members-by-categories/",
+        get_members_by_categories,
+        name="Members_by_categories_getter",
+    ),
     path("apply/", apply, name="Apply"),
     path("applications/", get_applications, name="Applications"),
+    path("applications/export/", export_applications, name="Applications_export"),
+    path(
+        "applications/statistics/",
+        get_application_statistics,
+        name="Application_statistics",
+    ),
     path("health-check/", health_check, name="Health_check"),
     path("member/image", UpdateMemberImageView.as_view(), name="Update_member_image"),
+    path("member/image/<int:job_id>", get_image_job, name="Image_job"),
     path("member/category", MemberCategoryView.as_view(), name="Member_category"),
+    path("projects/", get_projects_descriptions, name="Projects_getter"),
 ]
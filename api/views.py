@@ -7,6 +7,8 @@ from rest_framework.permissions import AllowAny
 
 from django.contrib.auth.models import User
 
+from cogito import mail
+
 # Create your views here.
 
 
@@ -27,6 +29,9 @@ def health_check(request):
         if cache.get("health_check") != "ok":
             raise ValueError("Cache not working")
 
-        return HttpResponse("OK", content_type="text/plain")
+        # An SMTP outage is reported, but does not make the API unhealthy
+        email = mail.state()
+        body = f"OK\nEmail circuit: {email['state']} ({email['failures']} failures)"
+        return HttpResponse(body, content_type="text/plain")
     except (DatabaseError, ValueError) as e:
         return HttpResponse(str(e), status=500, content_type="text/plain")
@@ -0,0 +1,125 @@
+"""
+Circuit breaker around the email backend.
+
+After EMAIL_CIRCUIT_FAILURE_THRESHOLD consecutive failures to reach the SMTP
+server, the circuit opens and every attempt fails immediately with CircuitOpen
+for EMAIL_CIRCUIT_COOLDOWN seconds, instead of waiting for EMAIL_TIMEOUT
+again. After the cooldown a single attempt, the probe, is let through while
+the others keep failing with CircuitOpen; it closes the circuit on success and
+opens it again on failure. The state is kept in the cache, so all processes
+share it.
+"""
+
+import smtplib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+FAILURES_KEY = "email_circuit:failures"
+OPEN_UNTIL_KEY = "email_circuit:open_until"
+# Held by the attempt probing the server while half-open, until it is done
+PROBE_KEY = "email_circuit:probe"
+
+# Errors about a single message, which say nothing about the server being down
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)
+
+
+class CircuitOpen(smtplib.SMTPException):
+    """Raised instead of contacting the SMTP server while the circuit is open"""
+
+    def __init__(self, open_until: float):
+        self.open_until = open_until
+        super().__init__(
+            f"Email circuit is open for {max(0, open_until - time.time()):.0f} s"
+        )
+
+
+def state() -> dict:
+    """{"state": "closed" | "open" | "half-open", "failures": n, "open_until": ts}"""
+    open_until = cache.get(OPEN_UNTIL_KEY)
+    failures = cache.get(FAILURES_KEY, 0)
+    if open_until is None:
+        circuit = "closed"
+    elif open_until > time.time():
+        circuit = "open"
+    else:
+        circuit = "half-open"
+    return {"state": circuit, "failures": failures, "open_until": open_until}
+
+
+def check() -> None:
+    """Raise CircuitOpen if the SMTP server should not be contacted now"""
+    open_until = cache.get(OPEN_UNTIL_KEY)
+    if open_until is None:
+        return
+    now = time.time()
+    if open_until > now:
+        raise CircuitOpen(open_until)
+    # Half-open: the first caller probes the server. The key expires after a
+    # cooldown, so a probe that died without reporting is replaced
+    cooldown = settings.EMAIL_CIRCUIT_COOLDOWN
+    if not cache.add(PROBE_KEY, now + cooldown, timeout=cooldown):
+        raise CircuitOpen(cache.get(PROBE_KEY, now))
+
+
+def record_success() -> None:
+    cache.delete_many([FAILURES_KEY, OPEN_UNTIL_KEY, PROBE_KEY])
+
+
+def record_failure() -> None:
+    cache.add(FAILURES_KEY, 0, timeout=None)
+    failures = cache.incr(FAILURES_KEY)
+    half_open = cache.get(OPEN_UNTIL_KEY) is not None
+    if half_open or failures >= settings.EMAIL_CIRCUIT_FAILURE_THRESHOLD:
+        cache.set(
+            OPEN_UNTIL_KEY,
+            time.time() + settings.EMAIL_CIRCUIT_COOLDOWN,
+            timeout=None,
+        )
+    cache.delete(PROBE_KEY)
+
+
+class CircuitBreakerEmailBackend(BaseEmailBackend):
+    """Wraps EMAIL_CIRCUIT_BACKEND, the backend that actually sends the email"""
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.backend = get_connection(
+            settings.EMAIL_CIRCUIT_BACKEND, fail_silently=False, **kwargs
+        )
+
+    def _call(self, method, *args):
+        try:
+            check()
+            result = method(*args)
+        except CircuitOpen:
+            if not self.fail_silently:
+                raise
+            return None
+        except MESSAGE_ERRORS:
+            # The server answered, so it is up
+            record_success()
+            if not self.fail_silently:
+                raise
+            return None
+        except Exception:
+            record_failure()
+            if not self.fail_silently:
+                raise
+            return None
+        record_success()
+        return result
+
+    def open(self):
+        return self._call(self.backend.open)
+
+    def close(self):
+        return self.backend.close()
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        return self._call(self.backend.send_messages, email_messages) or 0
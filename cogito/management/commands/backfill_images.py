@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from team import images
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the dimensions, file size, placeholder and variants of member "
+        "images and project logos that do not have them yet"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Process every image, not only those missing their metadata",
+        )
+
+    def handle(self, *args, **options):
+        for model, (image_field, _) in images.IMAGE_FIELDS.items():
+            queryset = model.objects.exclude(
+                Q(**{f"{image_field}__isnull": True}) | Q(**{image_field: ""})
+            )
+            if not options["all"]:
+                queryset = queryset.filter(**{f"{image_field}_width__isnull": True})
+
+            processed = 0
+            unreadable = 0
+            for instance in queryset.iterator():
+                images.process_image(instance)
+                processed += 1
+                if getattr(instance, f"{image_field}_width") is None:
+                    unreadable += 1
+
+            name = model._meta.verbose_name_plural
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Processed {processed} {name} ({unreadable} could not be read)"
+                )
+            )
@@ -0,0 +1,281 @@
+import io
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from team import exports, fast_serializers
+from team.jobs import apply_member_images
+from team.models import (
+    ApplicationProjectChoice,
+    Member,
+    MemberApplication,
+    MemberCategory,
+    Project,
+    ProjectMember,
+    resolve_project_choices,
+)
+from team.serializers import MemberSerializer
+
+
+class Rollback(Exception):
+    """Raised to roll back the benchmark data"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Run benchmarks against generated data. "
+        "The data is created in a transaction that is rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "subcommand",
+            type=str,
+            help="Benchmark to run (member_listing, member_images, application_filters, application_export)",
+        )
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[100, 1000, 10000],
+            help="Number of rows to benchmark with",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of runs per size, the fastest run is reported",
+        )
+
+    def handle(self, *args, **options):
+        subcommand = options["subcommand"]
+
+        if subcommand == "member_listing":
+            benchmark = self.member_listing
+        elif subcommand == "member_images":
+            benchmark = self.member_images
+        elif subcommand == "application_filters":
+            benchmark = self.application_filters
+        elif subcommand == "application_export":
+            benchmark = self.application_export
+        else:
+            raise CommandError(f"Unknown subcommand: {subcommand}")
+
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    benchmark(size, options["repeat"])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def _time(self, repeat: int, func) -> float:
+        """Fastest of `repeat` runs of `func`, in milliseconds"""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
+
+    def _member_orders(self, size: int) -> range:
+        """Primary keys for `size` generated members, after the existing ones"""
+        first = (Member.objects.aggregate(Max("order"))["order__max"] or 0) + 1
+        return range(first, first + size)
+
+    def member_listing(self, size: int, repeat: int):
+        categories = MemberCategory.objects.bulk_create(
+            MemberCategory(title=f"Category {i}") for i in range(5)
+        )
+        projects = Project.objects.bulk_create(
+            Project(
+                name=f"Project {i}",
+                description="Description",
+                hours_a_week=5,
+                logo=f"images/project_{i}.png",
+            )
+            for i in range(20)
+        )
+        orders = self._member_orders(size)
+        members = Member.objects.bulk_create(
+            Member(
+                order=i,
+                name=f"Member {i}",
+                title="Member",
+                image=f"images/member_{i}.jpg",
+                email=f"member{i}@example.com",
+            )
+            for i in orders
+        )
+        Member.category.through.objects.bulk_create(
+            Member.category.through(
+                member_id=m.order, membercategory=categories[m.order % 5]
+            )
+            for m in members
+        )
+        ProjectMember.objects.bulk_create(
+            ProjectMember(
+                member=m, project=projects[m.order % 20], role="Developer", year=2024
+            )
+            for m in members
+        )
+
+        fields = MemberSerializer.rendered_fields()
+        queryset = Member.objects.filter(order__gte=orders.start)
+
+        serializer_ms = self._time(
+            repeat,
+            lambda: MemberSerializer(queryset.with_related(fields), many=True).data,
+        )
+        fast_ms = self._time(
+            repeat,
+            lambda: fast_serializers.serialize_members(
+                fast_serializers.member_values(queryset, fields), fields
+            ),
+        )
+        self.stdout.write(
+            f"{size:>6} members: MemberSerializer {serializer_ms:8.1f} ms, "
+            f"fast path {fast_ms:8.1f} ms ({serializer_ms / fast_ms:.1f}x)"
+        )
+
+    def member_images(self, size: int, repeat: int):
+        orders = self._member_orders(size)
+        Member.objects.bulk_create(
+            Member(order=i, name=f"Member_{i}", title="Member") for i in orders
+        )
+        buffer = io.BytesIO()
+        Image.new("RGB", (400, 400)).save(buffer, "JPEG")
+        content = buffer.getvalue()
+
+        def uploads():
+            return [
+                SimpleUploadedFile(f"Member_{i}.jpg", content, "image/jpeg")
+                for i in orders
+            ]
+
+        def one_by_one(images):
+            # How UpdateMemberImageView used to apply uploads
+            for image in images:
+                member = Member.objects.get(name=image.name.rsplit(".", 1)[0])
+                member.image = image
+                member.save()
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                results = {}
+                for label, apply in (
+                    ("one by one", one_by_one),
+                    ("bulk", apply_member_images),
+                ):
+                    timings = []
+                    for _ in range(repeat):
+                        images = uploads()
+                        with CaptureQueriesContext(connection) as queries:
+                            start = time.perf_counter()
+                            apply(images)
+                            timings.append((time.perf_counter() - start) * 1000)
+                    results[label] = (min(timings), len(queries))
+
+        self.stdout.write(
+            f"{size:>6} images: "
+            + ", ".join(
+                f"{label} {ms:8.1f} ms / {count} queries"
+                for label, (ms, count) in results.items()
+            )
+        )
+
+    def _create_applications(self, size: int):
+        projects = [f"Project {i}" for i in range(30)]
+        Project.objects.bulk_create(
+            Project(
+                name=name,
+                description="Description",
+                hours_a_week=5,
+                logo=f"images/{name}.png",
+            )
+            for name in projects
+        )
+        applications = MemberApplication.objects.bulk_create(
+            (
+                MemberApplication(
+                    first_name=f"Applicant {i}",
+                    last_name="Nordmann",
+                    email=f"applicant{i}@example.com",
+                    phone_number="12345678",
+                    about="I would like to join",
+                    lead=i % 4 == 0,
+                    projects_to_join=[projects[(i + j * 7) % 30] for j in range(3)],
+                )
+                for i in range(size)
+            ),
+            batch_size=5000,
+        )
+        # bulk_create sends no post_save, which would resolve the choices
+        ApplicationProjectChoice.objects.bulk_create(
+            resolve_project_choices(applications), batch_size=5000
+        )
+        # Spread the applications over a year, in one update so the index is
+        # not full of dead row versions. Only the generated rows are touched,
+        # so real applications are not locked
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE team_memberapplication "
+                "SET date_of_application = %s - make_interval(days => (id %% 365)::int) "
+                "WHERE id = ANY(%s)",
+                [now, [application.id for application in applications]],
+            )
+            cursor.execute("ANALYZE team_memberapplication")
+            cursor.execute("ANALYZE team_applicationprojectchoice")
+
+    def application_filters(self, size: int, repeat: int):
+        self._create_applications(size)
+        since = (timezone.now() - timedelta(days=14)).date()
+        applications = MemberApplication.objects.order_by("date_of_application", "id")
+        queries = {
+            "project": applications.filter_by(project="Project 3"),
+            "date range": applications.filter_by(since=since),
+            "project + lead": applications.filter_by(project="Project 3", lead=True),
+            # Ranked, as the endpoint returns search results
+            "ranked text": MemberApplication.objects.search("applicant1234").order_by(
+                "-search_rank"
+            ),
+        }
+        results = []
+        for label, queryset in queries.items():
+            ms = self._time(repeat, lambda: list(queryset[:50].values_list("id")))
+            results.append(f"{label} {ms:6.1f} ms")
+        self.stdout.write(f"{size:>6} applications: " + ", ".join(results))
+
+    def application_export(self, size: int, repeat: int):
+        self._create_applications(size)
+        queryset = MemberApplication.objects.order_by("date_of_application", "id")
+        for export_format in ("csv", "ndjson"):
+            start = time.perf_counter()
+            content = exports.export_response(queryset, export_format).streaming_content
+            total = len(next(content))
+            first_ms = (time.perf_counter() - start) * 1000
+            total += sum(len(chunk) for chunk in content)
+            total_ms = (time.perf_counter() - start) * 1000
+
+            # Measured in a second run, as tracing slows the export down
+            tracemalloc.start()
+            for _ in exports.export_response(queryset, export_format):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            self.stdout.write(
+                f"{size:>6} applications, {export_format:>6}: first chunk "
+                f"{first_ms:6.1f} ms, all {total_ms:8.1f} ms, {total / 1e6:6.1f} MB "
+                f"streamed, peak memory {peak / 1e6:5.1f} MB"
+            )
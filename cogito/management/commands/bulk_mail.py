@@ -0,0 +1,140 @@
+import argparse
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import TemplateDoesNotExist
+
+from team import mailing
+from team.models import MemberApplication
+
+
+class Command(BaseCommand):
+    help = (
+        "Send a templated email (team/emails/<template>.txt) to the applicants "
+        "matching the given filters"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "template",
+            type=str,
+            help="Email template to send (interview_invite, acceptance)",
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Only applications sent on or after this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            help="Only applications sent on or before this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--lead",
+            action=argparse.BooleanOptionalAction,
+            default=None,
+            help="Only applicants who do (--lead) or do not (--no-lead) want to lead",
+        )
+        parser.add_argument(
+            "--project",
+            type=str,
+            help="Only applicants who want to join this project",
+        )
+        parser.add_argument(
+            "--id",
+            type=int,
+            nargs="+",
+            dest="ids",
+            help="Only the applications with these ids",
+        )
+        parser.add_argument(
+            "--context",
+            nargs="+",
+            default=[],
+            metavar="KEY=VALUE",
+            help='Extra template variables, like when="Monday at 18:00"',
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of emails to send over one SMTP connection",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=10.0,
+            help="Maximum number of emails per second, 0 for no limit",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show the recipients and the first email without sending anything",
+        )
+
+    def handle(self, *args, **options):
+        applications = self.get_applications(options)
+
+        extra_context = {}
+        for item in options["context"]:
+            key, separator, value = item.partition("=")
+            if not separator:
+                raise CommandError(f"Context must be given as KEY=VALUE: {item}")
+            extra_context[key] = value
+
+        try:
+            messages = mailing.render_messages(
+                applications, options["template"], extra_context
+            )
+        except TemplateDoesNotExist as e:
+            raise CommandError(f"Unknown template: {e}")
+
+        if not messages:
+            self.stdout.write("No applications match the filters")
+            return
+
+        if options["dry_run"]:
+            for message in messages:
+                self.stdout.write(f"Would send to {', '.join(message.to)}")
+            self.stdout.write(f"\nSubject: {messages[0].subject}\n\n{messages[0].body}")
+            self.stdout.write(f"Would send {len(messages)} emails")
+            return
+
+        def report(recipient, error):
+            if error is None:
+                self.stdout.write(f"Sent to {recipient}")
+            else:
+                self.stderr.write(f"Failed to send to {recipient}: {error}")
+
+        start = time.perf_counter()
+        results = mailing.send_bulk(
+            messages,
+            batch_size=options["batch_size"],
+            rate=options["rate"] or None,
+            on_result=report,
+        )
+        elapsed = time.perf_counter() - start
+
+        failed = [recipient for recipient, error in results if error is not None]
+        sent = len(results) - len(failed)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {sent} of {len(results)} emails in {elapsed:.1f} s "
+                f"({sent / elapsed if elapsed else sent:.1f} per second)"
+            )
+        )
+        if failed:
+            self.stderr.write(f"{len(failed)} failed: {', '.join(failed)}")
+
+    def get_applications(self, options):
+        applications = MemberApplication.objects.filter_by(
+            since=options["since"],
+            until=options["until"],
+            lead=options["lead"],
+            project=options["project"],
+        ).order_by("date_of_application", "id")
+        if options["ids"]:
+            applications = applications.filter(id__in=options["ids"])
+        return applications
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from team import caching
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters for the public team response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters after printing them",
+        )
+
+    def handle(self, *args, **options):
+        stats = caching.stats()
+        self.stdout.write(
+            f"hits: {stats['hits']}, misses: {stats['misses']}, "
+            f"hit ratio: {stats['hit_ratio']:.1%}"
+        )
+        if options["reset"]:
+            caching.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from team import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued emails, retrying failed ones with backoff. "
+        "Runs until stopped unless --once is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver the emails that are due and exit instead of waiting for more",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls when no email is due",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Number of emails to send over one SMTP connection",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, attempted = outbox.deliver_due(options["batch_size"])
+            if attempted:
+                self.stdout.write(f"Sent {sent} of {attempted} emails")
+
+            if options["once"]:
+                break
+            if not attempted:
+                time.sleep(options["interval"])
+            # Do not hold on to a connection the database may have dropped
+            close_old_connections()
@@ -0,0 +1,69 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from team import images
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the files in the member image and project logo directories "
+        "that no member or project refers to"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the files that would be deleted without deleting them",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=60,
+            help="Only delete files older than this many minutes, so files "
+            "being uploaded or processed right now are left alone",
+        )
+
+    def handle(self, *args, **options):
+        referenced = images.referenced_files()
+        cutoff = timezone.now() - timedelta(minutes=options["min_age"])
+
+        count = 0
+        freed = 0
+        for storage, directory in self._directories():
+            for name in self._walk(storage, directory):
+                if name in referenced or storage.get_modified_time(name) > cutoff:
+                    continue
+                count += 1
+                freed += storage.size(name)
+                if options["dry_run"]:
+                    self.stdout.write(f"Would delete {name}")
+                else:
+                    storage.delete(name)
+                    self.stdout.write(f"Deleted {name}")
+
+        action = "Would free" if options["dry_run"] else "Freed"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} {freed} bytes in {count} files")
+        )
+
+    def _directories(self):
+        """(storage, directory) of every image field, without duplicates"""
+        directories = {}
+        for model, (image_field, _) in images.IMAGE_FIELDS.items():
+            field = model._meta.get_field(image_field)
+            directory = field.upload_to.strip("/")
+            directories[(id(field.storage), directory)] = (field.storage, directory)
+        return directories.values()
+
+    def _walk(self, storage, directory):
+        if not storage.exists(directory):
+            return
+        subdirectories, files = storage.listdir(directory)
+        for name in files:
+            yield os.path.join(directory, name)
+        for subdirectory in subdirectories:
+            yield from self._walk(storage, os.path.join(directory, subdirectory))
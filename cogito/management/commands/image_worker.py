@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from team import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued image jobs (uploaded member images and image variants). "
+        "Runs until stopped unless --once is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the queued jobs and exit instead of waiting for new ones",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = jobs.requeue_stale()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale jobs")
+
+            count = jobs.run_pending()
+            if count:
+                self.stdout.write(f"Processed {count} jobs")
+
+            if options["once"]:
+                break
+            if not count:
+                time.sleep(options["interval"])
+            # Do not hold on to a connection the database may have dropped
+            close_old_connections()
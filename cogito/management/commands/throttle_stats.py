@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from team import throttling
+
+
+class Command(BaseCommand):
+    help = "Show how many requests each throttle has rejected"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters after printing them",
+        )
+
+    def handle(self, *args, **options):
+        for scope, rejected in throttling.stats().items():
+            self.stdout.write(f"{scope}: {rejected} rejected")
+        if options["reset"]:
+            throttling.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
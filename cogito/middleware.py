@@ -0,0 +1,123 @@
+"""
+Response compression.
+
+Works like django.middleware.gzip.GZipMiddleware, but also offers Brotli when
+the optional `brotli` package is installed. Responses that come from a cache
+set a `cache_key` attribute (see team/caching.py); their compressed bodies are
+stored in the cache under that key, so they are compressed once instead of on
+every hit.
+
+Only API responses are compressed (see COMPRESSIBLE_TYPES), not HTML pages.
+"""
+
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# The API's content types only. HTML pages such as the admin carry CSRF
+# tokens, which compressing them would expose to BREACH
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+)
+
+# Smaller bodies are not worth the compression overhead
+MIN_LENGTH = 200
+
+
+def accepted_encodings(header: str) -> dict:
+    """Parse an Accept-Encoding header into {coding: q}"""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate(header: str, streaming: bool = False):
+    """The best encoding we can produce that the client accepts, or None"""
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0)
+    offered = ["gzip"] if streaming or brotli is None else ["br", "gzip"]
+    for coding in offered:
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(content)
+    return gzip.compress(content, mtime=0)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        # Byte ranges refer to the uncompressed body
+        if response.has_header("Content-Range"):
+            return response
+        if not response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < MIN_LENGTH:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        encoding = negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), response.streaming
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(response.streaming_content)
+            if response.has_header("Content-Length"):
+                del response["Content-Length"]
+        else:
+            compressed = self._compressed_content(response, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # The compressed body is no longer byte-for-byte the entity the strong
+        # ETag was computed for
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+
+        response["Content-Encoding"] = encoding
+        return response
+
+    def _compressed_content(self, response, encoding: str) -> bytes:
+        cache_key = getattr(response, "cache_key", None)
+        if cache_key is None:
+            return compress(response.content, encoding)
+
+        key = f"{cache_key}:{encoding}"
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress(response.content, encoding)
+            cache.set(key, compressed, timeout=settings.TEAM_CACHE_TIMEOUT)
+        return compressed
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 
 from dotenv import load_dotenv
 import os
+import sys
 from pathlib import Path
 
 from django.core.management.utils import get_random_secret_key
@@ -55,6 +56,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # External Libraries
     "rest_framework_swagger",
     "drf_yasg",
@@ -69,6 +71,7 @@ CORS_ORIGIN_ALLOW_ALL = True
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "cogito.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -128,8 +131,30 @@ DATABASES = {
 }
 
 
+# Seconds within which an identical application counts as a resubmission
+APPLY_DUPLICATE_WINDOW = int(os.getenv("APPLY_DUPLICATE_WINDOW", 600))
+
+REST_FRAMEWORK = {
+    # Proxies in front of the app, so throttling uses the client IP from
+    # X-Forwarded-For. Must be 0 when the app is reached directly
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 0)),
+    # Token bucket rates, see team/throttling.py
+    "DEFAULT_THROTTLE_RATES": {
+        "apply_ip": os.getenv("APPLY_THROTTLE_IP_RATE", "10/hour"),
+        "apply_email": os.getenv("APPLY_THROTTLE_EMAIL_RATE", "3/hour"),
+    },
+}
+
+
 # Email settings
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Sending goes through a circuit breaker (see cogito/mail.py) around the SMTP backend
+EMAIL_BACKEND = "cogito.mail.CircuitBreakerEmailBackend"
+EMAIL_CIRCUIT_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Consecutive failures before the circuit opens, and seconds it stays open
+EMAIL_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("EMAIL_CIRCUIT_FAILURE_THRESHOLD", 5))
+EMAIL_CIRCUIT_COOLDOWN = int(os.getenv("EMAIL_CIRCUIT_COOLDOWN", 60))
+# Seconds to wait on the SMTP server for connecting and each command
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", 10))
 EMAIL_HOST = "smtp.proisp.no"
 EMAIL_PORT = 465
 EMAIL_USE_SSL = True
@@ -139,6 +164,32 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 
+# Cache
+# File based so the web server, management commands and workers share entries.
+# The tests clear the cache, so they get their own in memory instead of wiping
+# the throttle buckets and circuit breaker state of a running server
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_LOCATION", os.path.join(BASE_DIR, "cache")),
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    }
+}
+if TESTING:
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    }
+
+# Public team responses are cached until the underlying data changes
+TEAM_CACHE_TIMEOUT = int(os.getenv("TEAM_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# Application statistics are cached per season, and dropped when an
+# application in the season is saved. Bulk changes show up after this long
+ANALYTICS_CACHE_TIMEOUT = int(os.getenv("ANALYTICS_CACHE_TIMEOUT", 60 * 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -183,6 +234,15 @@ MEDIA_URL = "/media/"
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# How cogito.views.serve_media delivers media files:
+# "django" streams them from the WSGI server (with Range and ETag support),
+# "x-accel-redirect" (nginx) and "x-sendfile" (Apache, Caddy, ...) leave
+# sending the file to the front proxy
+MEDIA_SERVE_MODE = os.getenv("MEDIA_SERVE_MODE", "django")
+
+# The internal nginx location that maps to MEDIA_ROOT, for "x-accel-redirect"
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/protected-media/")
+
 STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
 
 # Default primary key field type
@@ -1,5 +1,150 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from team.storage import is_content_addressed
 
 
 def index(request):
     return render(request, 'base.html', {})
+
+
+# Content-addressed files never change, anything else may be replaced
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=3600"
+
+# Directories under MEDIA_ROOT that are served. Others, such as the raw
+# uploads waiting for the image worker, are private
+PUBLIC_MEDIA_DIRECTORIES = ("images",)
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def _byte_range(header: str, size: int):
+    """
+    (start, end) of a single `bytes=` range, end inclusive. None when the
+    header should be ignored, and "unsatisfiable" when it asks for nothing.
+    Multiple ranges are rare for media and are answered with the whole file.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-500 is the last 500 bytes
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, end
+
+
+def _read_range(path, start: int, length: int):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT, replacing django.views.static.serve.
+
+    With MEDIA_SERVE_MODE set to "x-accel-redirect" (nginx) or "x-sendfile"
+    (Apache, lighttpd, Caddy) only the headers are produced and the front proxy
+    sends the file. In the default "django" mode whole files are handed to the
+    WSGI server's file wrapper, which uses sendfile() under gunicorn, and only
+    Range requests are read in Python.
+
+    Only files in PUBLIC_MEDIA_DIRECTORIES are served.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    relative_path = os.path.relpath(full_path, os.path.abspath(settings.MEDIA_ROOT))
+    if relative_path.split(os.sep)[0] not in PUBLIC_MEDIA_DIRECTORIES:
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": (
+            IMMUTABLE_CACHE_CONTROL
+            if is_content_addressed(path)
+            else MUTABLE_CACHE_CONTROL
+        ),
+    }
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        response = _file_response(request, path, full_path, stat.st_size, etag)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def _file_response(request, path, full_path, size, etag):
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+    mode = settings.MEDIA_SERVE_MODE
+
+    if mode == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+        return response
+    if mode == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+        return response
+
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    # A Range with an outdated If-Range gets the whole, current file
+    if range_header and request.META.get("HTTP_IF_RANGE", etag) == etag:
+        byte_range = _byte_range(range_header, size)
+
+    if byte_range == "unsatisfiable":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+    elif byte_range is not None:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(full_path, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -1,17 +1,43 @@
-import csv
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
 from django.db.models import TextField
 from django.forms import Textarea
 from django.utils.html import format_html, format_html_join
-from django.http import HttpResponse
+from . import exports
 from .models import (
+    ApplicationProjectChoice,
+    ImageJob,
     Member,
     MemberApplication,
     Project,
     MemberCategory,
+    OutgoingEmail,
 )
 
 
+class ApplicationChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        # Rank search results, unless a column to sort by was clicked
+        if self.query.strip() and ORDER_VAR not in self.params:
+            queryset = queryset.order_by("-search_rank", "-pk")
+        return queryset
+
+
+class ApplicationProjectChoiceInline(admin.TabularInline):
+    """The projects_to_join that matched a project, kept in sync on save"""
+
+    model = ApplicationProjectChoice
+    fields = ("rank", "project")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    verbose_name_plural = "Matched projects"
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 class MemberApplicationAdmin(admin.ModelAdmin):
     fieldsets = (
         (
@@ -28,6 +54,8 @@ class MemberApplicationAdmin(admin.ModelAdmin):
         ("Timestamps", {"fields": ("date_of_application", "updated_at")}),
     )
 
+    inlines = [ApplicationProjectChoiceInline]
+
     # Read-only system fields
     readonly_fields = ("date_of_application", "updated_at")
 
@@ -45,13 +73,11 @@ class MemberApplicationAdmin(admin.ModelAdmin):
     date_hierarchy = "date_of_application"
     list_per_page = 100
 
-    search_fields = (
-        "first_name",
-        "last_name",
-        "email",
-        "phone_number",
-        "about",
-        "projects_to_join",  # JSONField cast to text; icontains works on most backends
+    # Searches the indexed search_vector, see get_search_results()
+    search_fields = ("first_name", "last_name", "email")
+    search_help_text = (
+        "Words in the name, email, phone number, projects or application, "
+        "best matches first"
     )
 
     list_filter = (("date_of_application", admin.DateFieldListFilter),)
@@ -61,6 +87,14 @@ class MemberApplicationAdmin(admin.ModelAdmin):
         TextField: {"widget": Textarea(attrs={"rows": 6, "style": "width: 100%;"})},
     }
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.search(search_term), False
+
+    def get_changelist(self, request, **kwargs):
+        return ApplicationChangeList
+
     # Renderers
     @admin.display(description="Name", ordering="last_name")
     def full_name(self, obj: MemberApplication):
@@ -104,44 +138,15 @@ class MemberApplicationAdmin(admin.ModelAdmin):
             )
         return response
 
-    actions = ["export_selected_to_csv"]
+    actions = ["export_selected_to_csv", "export_selected_to_ndjson"]
 
     @admin.action(description="Export selected applications to CSV")
     def export_selected_to_csv(self, request, queryset):
-        fieldnames = [
-            "first_name",
-            "last_name",
-            "email",
-            "phone_number",
-            "lead",
-            "date_of_application",
-            "updated_at",
-            "projects_to_join",
-            "about",
-        ]
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = "attachment; filename=member_applications.csv"
-        writer = csv.writer(response)
-        writer.writerow(fieldnames)
-        for obj in queryset:
-            writer.writerow(
-                [
-                    obj.first_name,
-                    obj.last_name,
-                    obj.email,
-                    obj.phone_number,
-                    obj.lead,
-                    obj.date_of_application.isoformat()
-                    if obj.date_of_application
-                    else "",
-                    obj.updated_at.isoformat() if obj.updated_at else "",
-                    ", ".join(obj.projects_to_join)
-                    if isinstance(obj.projects_to_join, list)
-                    else "",
-                    (obj.about or "").replace("\n", " ").strip(),
-                ]
-            )
-        return response
+        return exports.export_response(queryset, "csv")
+
+    @admin.action(description="Export selected applications to NDJSON")
+    def export_selected_to_ndjson(self, request, queryset):
+        return exports.export_response(queryset, "ndjson")
 
 
 # Register your models here.
@@ -149,3 +154,5 @@ admin.site.register(Member)
 admin.site.register(MemberApplication, MemberApplicationAdmin)
 admin.site.register(MemberCategory)
 admin.site.register(Project)
+admin.site.register(ImageJob)
+admin.site.register(OutgoingEmail)
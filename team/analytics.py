@@ -0,0 +1,116 @@
+"""
+Recruiting statistics per season.
+
+A season is a semester: spring from January through June, fall from July
+through December. The statistics are aggregated in SQL and cached per season.
+Saving or deleting an application drops the cached statistics of its season
+(see team/signals.py), and ANALYTICS_CACHE_TIMEOUT bounds how long bulk
+changes, which send no signals, can go unnoticed.
+"""
+
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from .models import Semester
+
+CACHE_KEY = "analytics:{year}:{semester}"
+
+# Every project picked in an application, with its position in the list
+PROJECT_RANKS_SQL = """
+    SELECT choice.project, choice.rank, count(*)
+    FROM team_memberapplication application
+    CROSS JOIN LATERAL jsonb_array_elements_text(
+        CASE WHEN jsonb_typeof(application.projects_to_join) = 'array'
+        THEN application.projects_to_join ELSE '[]' END
+    ) WITH ORDINALITY AS choice(project, rank)
+    WHERE application.date_of_application >= %s
+    AND application.date_of_application < %s
+    GROUP BY choice.project, choice.rank
+"""
+
+TOTALS_SQL = """
+    SELECT
+        count(*),
+        count(*) FILTER (WHERE lead),
+        count(*) FILTER (WHERE NOT lead),
+        count(*) FILTER (WHERE lead IS NULL)
+    FROM team_memberapplication
+    WHERE date_of_application >= %s AND date_of_application < %s
+"""
+
+PER_DAY_SQL = """
+    SELECT (date_of_application AT TIME ZONE %s)::date AS day, count(*)
+    FROM team_memberapplication
+    WHERE date_of_application >= %s AND date_of_application < %s
+    GROUP BY day
+    ORDER BY day
+"""
+
+
+def season_of(moment: datetime) -> tuple:
+    """(year, semester) of an aware datetime"""
+    moment = timezone.localtime(moment)
+    return moment.year, Semester.SPRING if moment.month <= 6 else Semester.FALL
+
+
+def season_range(year: int, semester: str) -> tuple:
+    """The start and the (exclusive) end of a season, as aware datetimes"""
+    if semester == Semester.SPRING:
+        start, end = datetime(year, 1, 1), datetime(year, 7, 1)
+    else:
+        start, end = datetime(year, 7, 1), datetime(year + 1, 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def compute(year: int, semester: str) -> dict:
+    start, end = season_range(year, semester)
+    with connection.cursor() as cursor:
+        cursor.execute(TOTALS_SQL, [start, end])
+        total, lead, no_lead, lead_unknown = cursor.fetchone()
+
+        cursor.execute(PROJECT_RANKS_SQL, [start, end])
+        choices = cursor.fetchall()
+
+        cursor.execute(PER_DAY_SQL, [settings.TIME_ZONE, start, end])
+        per_day = cursor.fetchall()
+
+    # ranks[0] is how many put the project first, ranks[1] second, ...
+    max_rank = max((rank for _, rank, _ in choices), default=0)
+    projects = {}
+    for project, rank, count in choices:
+        projects.setdefault(project, [0] * max_rank)[rank - 1] = count
+
+    return {
+        "year": year,
+        "semester": semester,
+        "applications": total,
+        "lead": {"yes": lead, "no": no_lead, "unknown": lead_unknown},
+        "projects": [
+            {"project": project, "ranks": ranks, "applications": sum(ranks)}
+            for project, ranks in sorted(
+                projects.items(), key=lambda item: (-item[1][0], item[0])
+            )
+        ],
+        "per_day": [{"date": day, "applications": count} for day, count in per_day],
+    }
+
+
+def get(year: int, semester: str) -> tuple:
+    """The statistics of a season, and whether they came from the cache"""
+    key = CACHE_KEY.format(year=year, semester=semester)
+    data = cache.get(key)
+    if data is not None:
+        return data, True
+    data = compute(year, semester)
+    cache.set(key, data, timeout=settings.ANALYTICS_CACHE_TIMEOUT)
+    return data, False
+
+
+def invalidate(moment: datetime) -> None:
+    """Drop the cached statistics of the season `moment` is in"""
+    year, semester = season_of(moment)
+    cache.delete(CACHE_KEY.format(year=year, semester=semester))
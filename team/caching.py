@@ -0,0 +1,120 @@
+"""
+Response cache for the public team endpoints.
+
+Cached bodies are stored under a version token that is replaced whenever team
+data changes (see team/signals.py), so invalidating every cached response is a
+single cache write and stale entries simply expire.
+
+Each entry also carries its validators, so conditional requests are answered
+with a 304 without touching the database or the serializers: a content hash
+ETag, and as Last-Modified the time the version token was replaced, which
+covers changes no `updated_at` column sees (deletes, category changes).
+"""
+
+import hashlib
+import json
+import time
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Holds (token, time the team data last changed)
+VERSION_KEY = "team:changes"
+HITS_KEY = "team:cache:hits"
+MISSES_KEY = "team:cache:misses"
+
+
+def _new_version() -> tuple:
+    return uuid.uuid4().hex, int(time.time())
+
+
+def _version() -> tuple:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # When the data last changed is unknown, so it is taken to be now
+        cache.add(VERSION_KEY, _new_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate() -> None:
+    """Drop every cached team response"""
+    cache.set(VERSION_KEY, _new_version(), timeout=None)
+
+
+def make_key(endpoint: str, token: str, **params) -> str:
+    query = urlencode(
+        sorted((k, v) for k, v in params.items() if v is not None), doseq=True
+    )
+    digest = hashlib.md5(query.encode()).hexdigest()
+    return f"team:{token}:{endpoint}:{digest}"
+
+
+def _count(key: str) -> None:
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def stats() -> dict:
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / total if total else 0.0,
+    }
+
+
+def reset_stats() -> None:
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def cached_json_response(request, endpoint: str, build, **params) -> HttpResponse:
+    """
+    Return the JSON response for `endpoint` and `params` from the cache,
+    calling `build()` to produce the data on a miss.
+
+    Answers with 304 Not Modified when the request's If-None-Match or
+    If-Modified-Since header shows the client already has the current body.
+    """
+    token, changed_at = _version()
+    key = make_key(endpoint, token, **params)
+    entry = cache.get(key)
+    if entry is None:
+        _count(MISSES_KEY)
+        body = json.dumps(build(), cls=DjangoJSONEncoder).encode()
+        entry = {
+            "body": body,
+            "etag": quote_etag(hashlib.md5(body).hexdigest()),
+            "last_modified": changed_at,
+        }
+        cache.set(key, entry, timeout=settings.TEAM_CACHE_TIMEOUT)
+        state = "MISS"
+    else:
+        _count(HITS_KEY)
+        state = "HIT"
+
+    response = HttpResponse(entry["body"], content_type="application/json")
+    response["X-Cache"] = state
+    # Lets CompressionMiddleware cache the compressed variants of this body
+    response.cache_key = f"{key}:{entry['etag']}"
+    response["ETag"] = entry["etag"]
+    response["Last-Modified"] = http_date(entry["last_modified"])
+
+    return get_conditional_response(
+        request,
+        etag=entry["etag"],
+        last_modified=entry["last_modified"],
+        response=response,
+    )
@@ -0,0 +1,156 @@
+"""
+Fast read path for the public member listing.
+
+Builds the same dicts as MemberSerializer straight from `.values()` rows and
+two bulk queries for categories and project memberships, without going through
+DRF's per-field `to_representation` machinery. The output must stay identical
+to MemberSerializer's; MemberFastPathParityTests in team/tests.py checks that.
+"""
+
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .images import variant_urls
+from .models import Member, Project, ProjectMember, Semester
+
+MEMBER_COLUMNS = (
+    "order",
+    "name",
+    "title",
+    "image",
+    "image_variants",
+    "image_width",
+    "image_height",
+    "image_size",
+    "image_placeholder",
+    "email",
+    "github",
+    "linkedIn",
+    "created_at",
+    "updated_at",
+)
+
+SEMESTER_LABELS = dict(Semester.choices)
+
+
+def _datetime(value):
+    """Same output as rest_framework.fields.DateTimeField with ISO 8601"""
+    if not value:
+        return None
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _file_url(storage, name):
+    """Same output as rest_framework.fields.ImageField without a request"""
+    return storage.url(name) if name else None
+
+
+def member_values(queryset, fields):
+    """The `.values()` queryset holding the member columns among `fields`"""
+    columns = {"order"} | {f for f in fields if f in MEMBER_COLUMNS}
+    return queryset.values(*columns)
+
+
+def member_categories(member_ids) -> dict:
+    """Map each member id to its category titles, in MemberSerializer's order"""
+    through = Member.category.through.objects.filter(member_id__in=member_ids)
+    categories = defaultdict(list)
+    for member_id, title in through.order_by("membercategory__title").values_list(
+        "member_id", "membercategory__title"
+    ):
+        categories[member_id].append(title)
+    return categories
+
+
+def _project_memberships(member_ids) -> dict:
+    logo_storage = Project._meta.get_field("logo").storage
+    rows = ProjectMember.objects.filter(member_id__in=member_ids).values_list(
+        "member_id",
+        "role",
+        "year",
+        "semester",
+        "project__id",
+        "project__name",
+        "project__logo",
+        "project__logo_variants",
+        "project__logo_width",
+        "project__logo_height",
+        "project__logo_size",
+        "project__logo_placeholder",
+        "project__hours_a_week",
+        "project__github_link",
+    )
+    memberships = defaultdict(list)
+    for member_id, role, year, semester, *project in rows:
+        (
+            project_id,
+            name,
+            logo,
+            logo_variants,
+            logo_width,
+            logo_height,
+            logo_size,
+            logo_placeholder,
+            hours_a_week,
+            github_link,
+        ) = project
+        memberships[member_id].append(
+            {
+                "project": {
+                    "id": project_id,
+                    "name": name,
+                    "logo": _file_url(logo_storage, logo),
+                    "logo_variants": variant_urls(logo_storage, logo_variants),
+                    "logo_width": logo_width,
+                    "logo_height": logo_height,
+                    "logo_size": logo_size,
+                    "logo_placeholder": logo_placeholder,
+                    "hours_a_week": hours_a_week,
+                    "github_link": github_link,
+                },
+                "role": role,
+                "year": year,
+                "semester": SEMESTER_LABELS.get(semester, semester),
+            }
+        )
+    return memberships
+
+
+def serialize_members(rows, fields, categories=None) -> list:
+    """
+    Serialize `rows` from member_values() like MemberSerializer would, keeping
+    only `fields` (as returned by MemberSerializer.rendered_fields()).
+    Pass `categories` from member_categories() if the caller already has them.
+    """
+    rows = list(rows)
+    member_ids = [row["order"] for row in rows]
+    image_storage = Member._meta.get_field("image").storage
+
+    if categories is None and "category" in fields:
+        categories = member_categories(member_ids)
+    memberships = (
+        _project_memberships(member_ids) if "project_memberships" in fields else None
+    )
+
+    data = []
+    for row in rows:
+        member = {}
+        for field in fields:
+            if field == "category":
+                member[field] = categories.get(row["order"], [])
+            elif field == "project_memberships":
+                member[field] = memberships.get(row["order"], [])
+            elif field == "image":
+                member[field] = _file_url(image_storage, row[field])
+            elif field == "image_variants":
+                member[field] = variant_urls(image_storage, row[field])
+            elif field in ("created_at", "updated_at"):
+                member[field] = _datetime(row[field])
+            else:
+                member[field] = row[field]
+        data.append(member)
+    return data
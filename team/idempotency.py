@@ -0,0 +1,61 @@
+"""
+Recognizing resubmitted applications.
+
+A client may send an `Idempotency-Key` header, and an application with a key
+that was seen before is not stored again. Without a key, an application with
+the same normalized content as one received within APPLY_DUPLICATE_WINDOW
+seconds is treated as the same submission, which catches double-clicks and
+retries. Both lookups go through an index.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.utils import timezone
+
+from .models import MemberApplication
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def payload_hash(validated_data: dict) -> str:
+    """SHA-256 of the application, ignoring case and surrounding whitespace"""
+    normalized = {}
+    for field, value in validated_data.items():
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if field == "email":
+                value = value.lower()
+        normalized[field] = value
+    payload = json.dumps(normalized, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def lock(payload_hash: str) -> None:
+    """
+    Serialize concurrent submissions of the same application until the end of
+    the current transaction, so only one of them is stored.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [int(payload_hash[:15], 16)])
+
+
+def find_key(key: str):
+    return MemberApplication.objects.filter(idempotency_key=key).first()
+
+
+def find_recent(payload_hash: str):
+    """The application with this hash received within the duplicate window"""
+    since = timezone.now() - timedelta(seconds=settings.APPLY_DUPLICATE_WINDOW)
+    return (
+        MemberApplication.objects.filter(
+            payload_hash=payload_hash, date_of_application__gte=since
+        )
+        .order_by("-date_of_application")
+        .first()
+    )
@@ -0,0 +1,217 @@
+"""
+Member and project image handling.
+
+Uploaded images are kept as they are, and resized, re-encoded variants are
+generated next to them for the frontend to pick from with `srcset`. The
+variants are recorded on the row together with the name of the image they were
+made from, so they are only regenerated when the image itself changes.
+
+The dimensions, file size and a tiny blurred placeholder of the image are
+stored on the row at the same time, so nothing has to open an image file to
+serialize a member or project.
+"""
+
+import base64
+import io
+import logging
+import os
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import caching
+from .models import Member, Project
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (160, 320, 640)
+
+# format name: (Pillow format, file extension, save options)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 6}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# model: (image field, variants field)
+IMAGE_FIELDS = {
+    Member: ("image", "image_variants"),
+    Project: ("logo", "logo_variants"),
+}
+
+# Stored next to each image field as `<image field>_<name>`
+METADATA_FIELDS = ("width", "height", "size", "placeholder")
+
+PLACEHOLDER_WIDTH = 16
+
+
+def derived_fields(model) -> list:
+    """The fields build_variants() sets on instances of `model`"""
+    image_field, variants_field = IMAGE_FIELDS[model]
+    return [variants_field] + [f"{image_field}_{name}" for name in METADATA_FIELDS]
+
+
+def variant_urls(storage, variants) -> dict:
+    """Turn stored variants into {format: {width: url}} for the API"""
+    return {
+        name: {width: storage.url(path) for width, path in widths.items()}
+        for name, widths in (variants or {}).get("formats", {}).items()
+    }
+
+
+def referenced_files() -> set:
+    """Names of every image, logo and variant some row refers to"""
+    names = set()
+    for model, (image_field, variants_field) in IMAGE_FIELDS.items():
+        rows = model.objects.values_list(image_field, variants_field)
+        for image, variants in rows.iterator():
+            if image:
+                names.add(image)
+            for widths in (variants or {}).get("formats", {}).values():
+                names.update(widths.values())
+    return names
+
+
+def needs_variants(instance) -> bool:
+    image_field, variants_field = IMAGE_FIELDS[type(instance)]
+    variants = getattr(instance, variants_field) or {}
+    return variants.get("source") != (getattr(instance, image_field).name or None)
+
+
+def _convert(image, pillow_format: str):
+    """Convert `image` to a mode `pillow_format` can store"""
+    has_alpha = "A" in image.mode or "transparency" in image.info
+    if pillow_format != "JPEG":
+        if image.mode in ("RGB", "RGBA"):
+            return image
+        return image.convert("RGBA" if has_alpha else "RGB")
+    if not has_alpha:
+        return image.convert("RGB")
+    # JPEG has no alpha channel, so flatten transparent areas onto white
+    background = Image.new("RGB", image.size, "white")
+    background.paste(image.convert("RGBA"), mask=image.convert("RGBA"))
+    return background
+
+
+def open_image(fieldfile):
+    """The image in `fieldfile`, turned upright according to its EXIF data"""
+    with fieldfile.open("rb"):
+        image = ImageOps.exif_transpose(Image.open(fieldfile))
+        image.load()
+    return image
+
+
+def placeholder(image) -> str:
+    """A PLACEHOLDER_WIDTH pixels wide JPEG of `image` as a data URI"""
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    tiny = _convert(image, "JPEG").resize((PLACEHOLDER_WIDTH, height), Image.BOX)
+    buffer = io.BytesIO()
+    tiny.save(buffer, "JPEG", quality=40)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def generate_variants(image, fieldfile) -> dict:
+    """
+    Resize `image`, read from `fieldfile`, to each of VARIANT_WIDTHS that is
+    not wider than the image itself, in every format of VARIANT_FORMATS.
+    """
+    widths = [w for w in VARIANT_WIDTHS if w <= image.width] or [image.width]
+    stem = os.path.splitext(os.path.basename(fieldfile.name))[0]
+    directory = os.path.join(os.path.dirname(fieldfile.name), "variants")
+
+    formats = {}
+    for name, (pillow_format, extension, options) in VARIANT_FORMATS.items():
+        source = _convert(image, pillow_format)
+        formats[name] = {}
+        for width in widths:
+            height = max(1, round(image.height * width / image.width))
+            resized = source.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, pillow_format, **options)
+            path = os.path.join(directory, f"{stem}_{width}w.{extension}")
+            formats[name][str(width)] = fieldfile.storage.save(
+                path, ContentFile(buffer.getvalue())
+            )
+    return formats
+
+
+def build_variants(instance) -> dict:
+    """
+    Generate the variants and metadata of the member image or project logo of
+    `instance` and set them on it, without saving.
+    """
+    image_field, variants_field = IMAGE_FIELDS[type(instance)]
+    fieldfile = getattr(instance, image_field)
+
+    variants = {"source": fieldfile.name or None, "formats": {}}
+    metadata = {"width": None, "height": None, "size": None, "placeholder": ""}
+    if fieldfile:
+        try:
+            image = open_image(fieldfile)
+            variants["formats"] = generate_variants(image, fieldfile)
+            metadata = {
+                "width": image.width,
+                "height": image.height,
+                "size": fieldfile.size,
+                "placeholder": placeholder(image),
+            }
+        except (OSError, SuspiciousFileOperation) as e:
+            logger.warning(f"Could not create variants of {fieldfile.name}: {e}")
+
+    setattr(instance, variants_field, variants)
+    for name, value in metadata.items():
+        setattr(instance, f"{image_field}_{name}", value)
+    return variants
+
+
+def process_image(instance) -> None:
+    """Generate the variants and metadata of `instance` and store them on its row"""
+    build_variants(instance)
+    fields = derived_fields(type(instance))
+    # update() rather than save(), so post_save does not fire again
+    type(instance).objects.filter(pk=instance.pk).update(
+        **{field: getattr(instance, field) for field in fields}
+    )
+    caching.invalidate()
+
+
+def assign_member_images(images) -> tuple:
+    """
+    Set each uploaded image as the image of the member named like the file
+    (`Ola_Nordmann.jpg` belongs to the member named `Ola_Nordmann`).
+
+    All members are looked up in one query and updated with one bulk update,
+    so the number of queries does not grow with the number of images. Like
+    saving each member would, this leaves the variants to an ImageJob (see
+    jobs.apply_member_images).
+    Returns the updated members and the names that matched no member.
+    """
+    names = [image.name.rsplit(".", 1)[0] for image in images]
+
+    members = {}
+    for member in Member.objects.with_related().filter(name__in=names):
+        members.setdefault(member.name, member)
+
+    updated_members = []
+    members_not_found = []
+    now = timezone.now()
+    for name, image in zip(names, images):
+        member = members.get(name)
+        if member is None:
+            members_not_found.append(name)
+            continue
+        member.image.save(image.name, image, save=False)
+        # bulk_update() skips auto_now, so set it by hand
+        member.updated_at = now
+        updated_members.append(member)
+
+    if updated_members:
+        unique_members = list({m.pk: m for m in updated_members}.values())
+        with transaction.atomic():
+            Member.objects.bulk_update(unique_members, ["image", "updated_at"])
+        # bulk_update() does not send post_save, so invalidate by hand
+        caching.invalidate()
+
+    return updated_members, members_not_found
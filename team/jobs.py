@@ -0,0 +1,167 @@
+"""
+Background image processing.
+
+Requests only store what has to be done as an ImageJob, and `manage.py
+image_worker` does the decoding, resizing and re-encoding, so a large upload
+does not hold up the web worker that serves the public pages.
+"""
+
+import logging
+import os
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from . import images
+from .models import ImageJob
+from .serializers import MemberSerializer
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIRECTORY = "uploads"
+
+# A job that has been running this long is assumed to belong to a dead worker
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue_member_images(uploads) -> ImageJob:
+    """Store the uploaded files untouched and queue them for the worker"""
+    files = []
+    for upload in uploads:
+        path = default_storage.save(os.path.join(UPLOAD_DIRECTORY, upload.name), upload)
+        files.append({"name": upload.name, "path": path})
+    return ImageJob.objects.create(
+        kind=ImageJob.Kind.MEMBER_IMAGES, payload={"files": files}
+    )
+
+
+def enqueue_variants(instance) -> ImageJob:
+    """Queue generating the variants of a member image or project logo"""
+    return enqueue_many_variants([instance])[0]
+
+
+def enqueue_many_variants(instances) -> list:
+    """Queue the variants of several instances with a single insert"""
+    return ImageJob.objects.bulk_create(
+        ImageJob(
+            kind=ImageJob.Kind.VARIANTS,
+            payload={"model": instance._meta.label, "pk": instance.pk},
+        )
+        for instance in instances
+    )
+
+
+def apply_member_images(uploads) -> tuple:
+    """
+    images.assign_member_images(), then queue the variants of the updated
+    members, as the post_save of each member would
+    """
+    updated_members, members_not_found = images.assign_member_images(uploads)
+    unique_members = {member.pk: member for member in updated_members}.values()
+    enqueue_many_variants(m for m in unique_members if images.needs_variants(m))
+    return updated_members, members_not_found
+
+
+def _is_image(file) -> bool:
+    """Same check as rest_framework.fields.ImageField"""
+    try:
+        Image.open(file).verify()
+    except Exception:
+        return False
+    finally:
+        file.seek(0)
+    return True
+
+
+def _run_member_images(payload) -> dict:
+    uploads = []
+    invalid_images = []
+    try:
+        for upload in payload["files"]:
+            file = File(default_storage.open(upload["path"]), name=upload["name"])
+            if _is_image(file):
+                uploads.append(file)
+            else:
+                file.close()
+                invalid_images.append(upload["name"])
+
+        updated_members, members_not_found = apply_member_images(uploads)
+    finally:
+        for file in uploads:
+            file.close()
+        for upload in payload["files"]:
+            default_storage.delete(upload["path"])
+
+    return {
+        "updated_members": MemberSerializer(updated_members, many=True).data,
+        "members_not_found": members_not_found,
+        "invalid_images": invalid_images,
+    }
+
+
+def _run_variants(payload) -> dict:
+    model = apps.get_model(payload["model"])
+    instance = model.objects.filter(pk=payload["pk"]).first()
+    # The row may be gone, or a later job may already have done the work
+    if instance is None or not images.needs_variants(instance):
+        return {"skipped": True}
+    images.process_image(instance)
+    _, variants_field = images.IMAGE_FIELDS[model]
+    return {"variants": getattr(instance, variants_field)}
+
+
+HANDLERS = {
+    ImageJob.Kind.MEMBER_IMAGES: _run_member_images,
+    ImageJob.Kind.VARIANTS: _run_variants,
+}
+
+
+def claim_next():
+    """Mark the oldest pending job as running and return it, or None"""
+    with transaction.atomic():
+        job = (
+            ImageJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ImageJob.Status.PENDING)
+            .order_by("id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ImageJob.Status.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+    return job
+
+
+def run_job(job: ImageJob) -> None:
+    try:
+        job.result = HANDLERS[job.kind](job.payload)
+        job.status = ImageJob.Status.DONE
+    except Exception as e:
+        logger.exception(f"Image job {job.pk} failed")
+        job.error = f"{type(e).__name__}: {e}"
+        job.status = ImageJob.Status.FAILED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["result", "status", "error", "finished_at"])
+
+
+def run_pending() -> int:
+    """Run queued jobs until there are none left, returns how many were run"""
+    count = 0
+    while (job := claim_next()) is not None:
+        run_job(job)
+        count += 1
+    return count
+
+
+def requeue_stale() -> int:
+    """Put jobs left running by a worker that died back in the queue"""
+    return ImageJob.objects.filter(
+        status=ImageJob.Status.RUNNING,
+        started_at__lt=timezone.now() - STALE_AFTER,
+    ).update(status=ImageJob.Status.PENDING, started_at=None)
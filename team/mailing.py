@@ -0,0 +1,92 @@
+"""
+Bulk email to applicants.
+
+Messages are rendered per application from `team/emails/<name>.txt` and
+`team/emails/<name>_subject.txt`, and sent over one SMTP connection that is
+reused for up to `batch_size` messages, optionally at a limited rate. Every
+recipient is reported as sent or failed, so a failure never goes unnoticed or
+stops the rest of the mailing.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+
+def render_messages(applications, template: str, extra_context=None) -> list:
+    """One EmailMessage per application, rendered from `template`"""
+    messages = []
+    for application in applications:
+        context = {"application": application, **(extra_context or {})}
+        subject = render_to_string(f"team/emails/{template}_subject.txt", context)
+        body = render_to_string(f"team/emails/{template}.txt", context)
+        messages.append(
+            EmailMessage(
+                # A subject is a single line
+                subject=" ".join(subject.split()),
+                body=body,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[application.email],
+            )
+        )
+    return messages
+
+
+def _close(connection) -> None:
+    try:
+        connection.close()
+    except Exception as e:
+        logger.warning(f"Could not close the email connection: {e}")
+
+
+def send_bulk(messages, batch_size: int = 100, rate=None, on_result=None) -> list:
+    """
+    Send `messages` and return [(recipient, error)], with error None for the
+    ones that were sent. A connection is reused for `batch_size` messages, and
+    no more than `rate` messages are sent per second when it is given.
+    `on_result(recipient, error)` is called as each message is done.
+    """
+    results = []
+    connection = None
+    sent_on_connection = 0
+    next_send = time.monotonic()
+
+    try:
+        for message in messages:
+            recipient = ", ".join(message.to)
+            if rate:
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_send = max(next_send, time.monotonic()) + 1 / rate
+
+            error = None
+            try:
+                if connection is None or sent_on_connection >= batch_size:
+                    if connection is not None:
+                        _close(connection)
+                    connection = get_connection()
+                    sent_on_connection = 0
+                    connection.open()
+                # One message per call, so a failure belongs to one recipient
+                connection.send_messages([message])
+            except Exception as e:
+                error = e
+                # The connection may be in any state after an error
+                if connection is not None:
+                    _close(connection)
+                    connection = None
+            sent_on_connection += 1
+
+            results.append((recipient, error))
+            if on_result is not None:
+                on_result(recipient, error)
+    finally:
+        if connection is not None:
+            _close(connection)
+    return results
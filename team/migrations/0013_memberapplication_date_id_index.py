@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0012_project_member_created_at_member_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='memberapplication',
+            index=models.Index(fields=['date_of_application', 'id'], name='team_application_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0013_memberapplication_date_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the image, generated when the image changes'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the logo, generated when the logo changes'),
+        ),
+    ]
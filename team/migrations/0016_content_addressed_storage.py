@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-18 20:40
+
+import team.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0015_imagejob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='member',
+            name='image',
+            field=models.ImageField(blank=True, help_text=' The image of the member', null=True, storage=team.storage.ContentAddressedStorage(), upload_to='images/', verbose_name='Image'),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='logo',
+            field=models.ImageField(storage=team.storage.ContentAddressedStorage(), upload_to='images/'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0016_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Height of the image in pixels', null=True),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='image_placeholder',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Tiny blurred copy of the image as a data URI, shown while it loads'),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='image_size',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Size of the image file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Width of the image in pixels', null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='logo_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Height of the logo in pixels', null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='logo_placeholder',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Tiny blurred copy of the logo as a data URI, shown while it loads'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='logo_size',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Size of the logo file in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='logo_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Width of the logo in pixels', null=True),
+        ),
+    ]
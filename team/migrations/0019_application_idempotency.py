@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0018_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memberapplication',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, help_text='The Idempotency-Key header the application was sent with', max_length=255, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='memberapplication',
+            name='payload_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Hash of the normalized application, to recognize resubmissions', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='memberapplication',
+            index=models.Index(fields=['payload_hash', 'date_of_application'], name='team_application_hash_idx'),
+        ),
+    ]
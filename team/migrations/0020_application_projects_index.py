@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 20:52
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0019_application_idempotency'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='memberapplication',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['projects_to_join'], name='team_application_projects_idx', opclasses=['jsonb_path_ops']),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-18 21:01
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0020_application_projects_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memberapplication',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('first_name', 'last_name', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector('email', 'phone_number', django.db.models.functions.comparison.Cast('projects_to_join', models.TextField()), config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('about', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('simple')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='memberapplication',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='team_application_search_idx'),
+        ),
+    ]
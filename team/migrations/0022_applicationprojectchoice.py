@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-18 21:10
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0021_application_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationProjectChoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(help_text="Position in the applicant's list of projects, 1 is their first choice", validators=[django.core.validators.MinValueValidator(1)])),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='memberapplication',
+            name='team_application_projects_idx',
+        ),
+        migrations.AddField(
+            model_name='applicationprojectchoice',
+            name='application',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='project_choices', to='team.memberapplication'),
+        ),
+        migrations.AddField(
+            model_name='applicationprojectchoice',
+            name='project',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='application_choices', to='team.project'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationprojectchoice',
+            index=models.Index(fields=['project', 'rank'], name='team_choice_project_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='applicationprojectchoice',
+            constraint=models.UniqueConstraint(fields=('application', 'rank'), name='team_choice_application_rank_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='applicationprojectchoice',
+            constraint=models.UniqueConstraint(fields=('application', 'project'), name='team_choice_application_project_uniq'),
+        ),
+    ]
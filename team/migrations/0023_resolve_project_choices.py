@@ -0,0 +1,58 @@
+from django.db import migrations
+from django.db.models.functions import Lower, Trim
+
+BATCH_SIZE = 1000
+
+
+def project_names(projects_to_join):
+    if not isinstance(projects_to_join, list):
+        return []
+    return [
+        name.strip()
+        for name in projects_to_join
+        if isinstance(name, str) and name.strip()
+    ]
+
+
+def resolve_project_choices(apps, schema_editor):
+    MemberApplication = apps.get_model('team', 'MemberApplication')
+    ApplicationProjectChoice = apps.get_model('team', 'ApplicationProjectChoice')
+    Project = apps.get_model('team', 'Project')
+
+    # Case-insensitive, trimmed names like project_ids_by_name(), the oldest of
+    # projects sharing a name wins
+    project_ids = dict(
+        Project.objects.annotate(lower_name=Lower(Trim('name')))
+        .order_by('-id')
+        .values_list('lower_name', 'id')
+    )
+
+    choices = []
+    applications = MemberApplication.objects.values_list('id', 'projects_to_join')
+    for application_id, projects_to_join in applications.iterator(chunk_size=BATCH_SIZE):
+        chosen = set()
+        for rank, name in enumerate(project_names(projects_to_join), start=1):
+            project_id = project_ids.get(name.lower())
+            if project_id is None or project_id in chosen:
+                continue
+            chosen.add(project_id)
+            choices.append(
+                ApplicationProjectChoice(
+                    application_id=application_id, project_id=project_id, rank=rank
+                )
+            )
+        if len(choices) >= BATCH_SIZE:
+            ApplicationProjectChoice.objects.bulk_create(choices)
+            choices = []
+    ApplicationProjectChoice.objects.bulk_create(choices)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0022_applicationprojectchoice'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_project_choices, migrations.RunPython.noop),
+    ]
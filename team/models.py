@@ -1,7 +1,23 @@
+import copy
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+)
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Lower, Trim
 from django.utils import timezone
 
+from .storage import content_addressed_storage
+
 
 class MemberCategory(models.Model):
     title = models.CharField(max_length=30)
@@ -13,6 +29,26 @@ class MemberCategory(models.Model):
         return self.title
 
 
+class MemberQuerySet(models.QuerySet):
+    def with_related(self, fields=None):
+        """
+        Prefetch everything MemberSerializer renders, so listing members costs
+        a fixed number of queries regardless of how many members there are.
+        Pass the rendered field names as `fields` to skip unused prefetches.
+        """
+        lookups = []
+        if fields is None or "category" in fields:
+            lookups.append("category")
+        if fields is None or "project_memberships" in fields:
+            lookups.append(
+                models.Prefetch(
+                    "project_memberships",
+                    queryset=ProjectMember.objects.select_related("project"),
+                )
+            )
+        return self.prefetch_related(*lookups)
+
+
 class Member(models.Model):
     order = models.IntegerField(
         "Order",
@@ -40,8 +76,39 @@ class Member(models.Model):
         null=True,
         blank=True,
         upload_to="images/",
+        storage=content_addressed_storage,
         help_text=" The image of the member",
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized copies of the image, generated when the image changes",
+    )
+    image_width = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Width of the image in pixels",
+    )
+    image_height = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Height of the image in pixels",
+    )
+    image_size = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Size of the image file in bytes",
+    )
+    image_placeholder = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Tiny blurred copy of the image as a data URI, shown while it loads",
+    )
 
     category = models.ManyToManyField(MemberCategory)
 
@@ -71,6 +138,8 @@ class Member(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MemberQuerySet.as_manager()
+
     class Meta:
         ordering = ["order"]
 
@@ -78,6 +147,89 @@ class Member(models.Model):
         return self.name
 
 
+def search_query(text: str):
+    """
+    Match applications containing every word of `text`, also as the start of
+    a longer word, so "kar" finds "Kari". Returns None when there are no words.
+    """
+    terms = []
+    for word in text.split():
+        word = word.replace("\\", "\\\\").replace("'", "''")
+        terms.append(f"'{word}':*")
+    if not terms:
+        return None
+    return SearchQuery(" & ".join(terms), search_type="raw", config="simple")
+
+
+# Whether projects_to_join contains a name, ignoring case and whitespace
+MENTIONS_PROJECT_SQL = """
+    EXISTS (
+        SELECT 1
+        FROM jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(team_memberapplication.projects_to_join) = 'array'
+            THEN team_memberapplication.projects_to_join ELSE '[]' END
+        ) AS name
+        WHERE lower(trim(name)) = %s
+    )
+"""
+
+
+class MemberApplicationQuerySet(models.QuerySet):
+    def mentioning(self, project_name: str):
+        """
+        Applications with `project_name` in projects_to_join. This scans the
+        JSON, so it is only used for names that are not a project
+        """
+        return self.filter(
+            RawSQL(
+                MENTIONS_PROJECT_SQL,
+                [project_name.strip().lower()],
+                output_field=models.BooleanField(),
+            )
+        )
+
+    def search(self, text: str):
+        """Applications matching `text`, with a `search_rank` annotation"""
+        query = search_query(text)
+        if query is None:
+            return self.none()
+        return self.filter(search_vector=query).annotate(
+            search_rank=SearchRank(models.F("search_vector"), query)
+        )
+
+    def filter_by(self, since=None, until=None, lead=None, project=None, q=None):
+        """
+        Narrow down applications, every filter is optional.
+        `since` and `until` are dates, both inclusive. They are compared as a
+        range on date_of_application, rather than on its date, so the index
+        on the column is used.
+        """
+        applications = self
+        if since is not None:
+            start = timezone.make_aware(datetime.combine(since, time.min))
+            applications = applications.filter(date_of_application__gte=start)
+        if until is not None:
+            end = datetime.combine(until + timedelta(days=1), time.min)
+            applications = applications.filter(
+                date_of_application__lt=timezone.make_aware(end)
+            )
+        if lead is not None:
+            applications = applications.filter(lead=lead)
+        if project:
+            # Resolved like the names applicants typed, and looked up first, as
+            # the planner estimates rows per project_id well but not per name
+            name = project.strip().lower()
+            project_id = project_ids_by_name([name]).get(name)
+            if project_id is None:
+                # Like a deleted project, still found by the name applicants typed
+                applications = applications.mentioning(name)
+            else:
+                applications = applications.filter(project_choices__project=project_id)
+        if q:
+            applications = applications.search(q)
+        return applications
+
+
 class MemberApplication(models.Model):
     first_name = models.CharField(max_length=100, help_text="Applicant's first name")
     last_name = models.CharField(max_length=100, help_text="Applicant's last name")
@@ -100,20 +252,279 @@ class MemberApplication(models.Model):
         help_text="Whether the applicant wants to be a project lead",
     )
     updated_at = models.DateTimeField(auto_now_add=True, blank=True, null=True)
+    idempotency_key = models.CharField(
+        max_length=255,
+        unique=True,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="The Idempotency-Key header the application was sent with",
+    )
+    payload_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Hash of the normalized application, to recognize resubmissions",
+    )
+
+    # Kept up to date by the database. The 'simple' configuration does no
+    # stemming, as applications are written in both Norwegian and English
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("first_name", "last_name", weight="A", config="simple")
+            + SearchVector(
+                "email",
+                "phone_number",
+                Cast("projects_to_join", models.TextField()),
+                weight="B",
+                config="simple",
+            )
+            + SearchVector("about", weight="C", config="simple")
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = MemberApplicationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (date_of_application, id)
+            models.Index(
+                fields=["date_of_application", "id"],
+                name="team_application_date_id_idx",
+            ),
+            # Resubmissions are looked up by hash within a time window
+            models.Index(
+                fields=["payload_hash", "date_of_application"],
+                name="team_application_hash_idx",
+            ),
+            # Full text search, see MemberApplicationQuerySet.search()
+            GinIndex(fields=["search_vector"], name="team_application_search_idx"),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets a save tell whether the project choices need resolving again
+        instance._loaded_projects_to_join = copy.deepcopy(
+            instance.__dict__.get("projects_to_join")
+        )
+        return instance
+
+    def project_names(self) -> list:
+        """The project names in projects_to_join, ignoring anything else"""
+        if not isinstance(self.projects_to_join, list):
+            return []
+        return [
+            name.strip()
+            for name in self.projects_to_join
+            if isinstance(name, str) and name.strip()
+        ]
+
+    def sync_project_choices(self):
+        """
+        Replace the project choices with the ones in projects_to_join, when it
+        changed. An unchanged list is left alone, so choices of a project that
+        was renamed since are kept.
+        """
+        if (
+            hasattr(self, "_loaded_projects_to_join")
+            and self._loaded_projects_to_join == self.projects_to_join
+        ):
+            return
+        self.project_choices.all().delete()
+        ApplicationProjectChoice.objects.bulk_create(resolve_project_choices([self]))
+        self._loaded_projects_to_join = copy.deepcopy(self.projects_to_join)
+
+
+def project_ids_by_name(names) -> dict:
+    """
+    {lowercased name: project id} for the projects with one of `names`,
+    ignoring case and surrounding whitespace. When projects share a name,
+    the oldest one wins.
+    """
+    lowered = {name.strip().lower() for name in names}
+    project_ids = {}
+    for name, project_id in (
+        Project.objects.annotate(lower_name=Lower(Trim("name")))
+        .filter(lower_name__in=lowered)
+        .order_by("-id")
+        .values_list("lower_name", "id")
+    ):
+        project_ids[name] = project_id
+    return project_ids
+
+
+def resolve_project_choices(applications) -> list:
+    """
+    Unsaved ApplicationProjectChoice rows for the projects_to_join of saved
+    `applications`. Names are matched case-insensitively, the oldest of
+    projects sharing a name wins, and unknown or repeated projects are left
+    out. The rank is the position in projects_to_join, starting at 1.
+    """
+    project_ids = project_ids_by_name(
+        name for application in applications for name in application.project_names()
+    )
+    choices = []
+    for application in applications:
+        chosen = set()
+        for rank, name in enumerate(application.project_names(), start=1):
+            project_id = project_ids.get(name.lower())
+            if project_id is None or project_id in chosen:
+                continue
+            chosen.add(project_id)
+            choices.append(
+                ApplicationProjectChoice(
+                    application=application, project_id=project_id, rank=rank
+                )
+            )
+    return choices
+
+
+def link_applications(project_name: str) -> int:
+    """
+    Link the applications naming `project_name` to the project the name
+    resolves to now, for a project that was created, renamed or deleted after
+    they were sent. Returns how many applications were linked.
+    """
+    name = project_name.strip().lower()
+    project_id = project_ids_by_name([name]).get(name)
+    if project_id is None:
+        return 0
+
+    choices = []
+    for application in MemberApplication.objects.mentioning(name):
+        for rank, chosen in enumerate(application.project_names(), start=1):
+            if chosen.lower() == name:
+                choices.append(
+                    ApplicationProjectChoice(
+                        application=application, project_id=project_id, rank=rank
+                    )
+                )
+                break
+    if not choices:
+        return 0
+
+    with transaction.atomic():
+        # Choices at the same position, of another project with this name
+        ApplicationProjectChoice.objects.filter(
+            reduce(
+                or_,
+                (
+                    models.Q(application=choice.application, rank=choice.rank)
+                    for choice in choices
+                ),
+            )
+        ).delete()
+        ApplicationProjectChoice.objects.bulk_create(choices, ignore_conflicts=True)
+    return len(choices)
+
+
+class ApplicationProjectChoice(models.Model):
+    """
+    A project an applicant wants to join, resolved from the names in
+    MemberApplication.projects_to_join (see team/signals.py), so applicants
+    of a project are found with an indexed join and survive a rename.
+    """
+
+    # The composite indexes below start with these columns, so they need no
+    # index of their own
+    application = models.ForeignKey(
+        "MemberApplication",
+        on_delete=models.CASCADE,
+        related_name="project_choices",
+        db_index=False,
+    )
+    project = models.ForeignKey(
+        "Project",
+        on_delete=models.CASCADE,
+        related_name="application_choices",
+        db_index=False,
+    )
+    rank = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1)],
+        help_text="Position in the applicant's list of projects, 1 is their first choice",
+    )
+
+    class Meta:
+        ordering = ["rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["application", "rank"],
+                name="team_choice_application_rank_uniq",
+            ),
+            models.UniqueConstraint(
+                fields=["application", "project"],
+                name="team_choice_application_project_uniq",
+            ),
+        ]
+        indexes = [
+            # Applicants of a project, optionally by rank
+            models.Index(
+                fields=["project", "rank"],
+                name="team_choice_project_rank_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.application} - {self.project} (#{self.rank})"
+
 
 class Semester(models.TextChoices):
     SPRING = "SP", "Spring"
     FALL = "FA", "Fall"
 
 
+class ProjectQuerySet(models.QuerySet):
+    def with_related(self, fields=None):
+        """
+        Prefetch the members of each project. Pass the rendered field names as
+        `fields` to skip the prefetch when the members are not rendered.
+        """
+        if fields is None or "members" in fields:
+            return self.prefetch_related("members")
+        return self
+
+
 class Project(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
-    logo = models.ImageField(upload_to="images/")
+    logo = models.ImageField(upload_to="images/", storage=content_addressed_storage)
+    logo_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized copies of the logo, generated when the logo changes",
+    )
+    logo_width = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Width of the logo in pixels",
+    )
+    logo_height = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Height of the logo in pixels",
+    )
+    logo_size = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Size of the logo file in bytes",
+    )
+    logo_placeholder = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Tiny blurred copy of the logo as a data URI, shown while it loads",
+    )
     # Add leader members using ManyToManyField, referencing 'email' field of Member
     hours_a_week = models.IntegerField()
     github_link = models.URLField(
@@ -132,9 +543,28 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectQuerySet.as_manager()
+
     def __str__(self) -> str:
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets a save tell whether the applications need linking again
+        instance._loaded_name = instance.__dict__.get("name")
+        return instance
+
+    def link_named_applications(self):
+        """
+        Link the applications that name the project, when it is new or was
+        renamed. Saving it under the same name does not scan the applications.
+        """
+        if hasattr(self, "_loaded_name") and self._loaded_name == self.name:
+            return
+        link_applications(self.name)
+        self._loaded_name = self.name
+
 
 class ProjectMember(models.Model):
 
@@ -176,3 +606,83 @@ class ProjectMember(models.Model):
             f"{self.member.name} - {self.project.name} "
             f"({self.get_semester_display()} {self.year})"
         )
+
+
+class ImageJob(models.Model):
+    """
+    Image processing queued by a request and run by `manage.py image_worker`,
+    so uploads do not hold up the web worker while images are decoded,
+    resized and re-encoded.
+    """
+
+    class Kind(models.TextChoices):
+        MEMBER_IMAGES = "member_images", "Member images"
+        VARIANTS = "variants", "Image variants"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    payload = models.JSONField(
+        default=dict, help_text="What to process, depends on the kind of job"
+    )
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # The worker picks the oldest pending job
+            models.Index(fields=["status", "id"], name="team_imagejob_status_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+
+class OutgoingEmail(models.Model):
+    """
+    An email queued by a request and delivered by `manage.py email_worker`,
+    so requests never wait on the SMTP server.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="When the worker may try to deliver the email (again)",
+    )
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # The worker picks pending emails that are due
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="team_email_status_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
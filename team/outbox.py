@@ -0,0 +1,135 @@
+"""
+Email outbox.
+
+Requests queue emails as OutgoingEmail rows, and `manage.py email_worker`
+delivers them over one SMTP connection per batch. Failed deliveries are retried
+with exponential backoff until MAX_ATTEMPTS is reached.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from cogito.mail import CircuitOpen
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 8
+RETRY_DELAY = timedelta(minutes=1)
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+# Claimed emails are hidden from other workers this long. A worker that dies
+# while sending leaves them to be picked up again afterwards
+LEASE = timedelta(minutes=5)
+
+
+def queue_email(subject, message, recipient_list, from_email=None) -> OutgoingEmail:
+    """Queue an email, with the same arguments as django.core.mail.send_mail"""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """1, 2, 4, ... minutes after the 1st, 2nd, 3rd, ... failed attempt"""
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def claim_due(limit: int) -> list:
+    """Lease up to `limit` pending emails that are due, oldest first"""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:limit]
+        )
+        OutgoingEmail.objects.filter(pk__in=[e.pk for e in emails]).update(
+            next_attempt_at=now + LEASE
+        )
+    return emails
+
+
+def _record_failure(email: OutgoingEmail, error: Exception) -> None:
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutgoingEmail.Status.FAILED
+        logger.error(f"Giving up on email {email.pk} to {email.recipients}: {error}")
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        logger.warning(f"Could not send email {email.pk}, will retry: {error}")
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def _postpone(emails, until: float) -> None:
+    """Put `emails` back without counting an attempt, the server was not tried"""
+    OutgoingEmail.objects.filter(pk__in=[e.pk for e in emails]).update(
+        next_attempt_at=datetime.fromtimestamp(until, tz=dt_timezone.utc)
+    )
+
+
+def deliver(emails) -> int:
+    """Send `emails` over one connection, returns how many were sent"""
+    if not emails:
+        return 0
+
+    sent = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except CircuitOpen as e:
+        _postpone(emails, e.open_until)
+        return 0
+    except Exception as e:
+        for email in emails:
+            _record_failure(email, e)
+        return 0
+
+    try:
+        for i, email in enumerate(emails):
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=email.recipients,
+                connection=connection,
+            )
+            try:
+                message.send()
+            except CircuitOpen as e:
+                _postpone(emails[i:], e.open_until)
+                break
+            except Exception as e:
+                _record_failure(email, e)
+                continue
+            email.status = OutgoingEmail.Status.SENT
+            email.attempts += 1
+            email.sent_at = timezone.now()
+            email.save(update_fields=["status", "attempts", "sent_at"])
+            sent += 1
+    finally:
+        try:
+            connection.close()
+        except Exception as e:
+            logger.warning(f"Could not close the email connection: {e}")
+    return sent
+
+
+def deliver_due(batch_size: int = 50) -> tuple:
+    """Deliver every due email, returns (sent, attempted)"""
+    sent = 0
+    attempted = 0
+    while emails := claim_due(batch_size):
+        sent += deliver(emails)
+        attempted += len(emails)
+    return sent, attempted
@@ -0,0 +1,89 @@
+"""
+Opt-in keyset (seek) pagination.
+
+A page is selected with a WHERE on the ordering columns, starting after the
+last row of the previous page, instead of an OFFSET. Fetching a page deep into
+a table therefore costs the same as fetching the first one, and the cursor
+stays stable when rows are added in front of it.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidPage(ValueError):
+    pass
+
+
+def is_requested(request) -> bool:
+    return "limit" in request.query_params or "cursor" in request.query_params
+
+
+def get_page_params(request, queryset, fields) -> tuple:
+    """
+    Read `limit` and `cursor` from the request.
+    Returns the page size and the position to seek past (None for the first page).
+    """
+    try:
+        limit = int(request.query_params.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise InvalidPage("limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise InvalidPage(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    cursor = request.query_params.get("cursor")
+    if not cursor:
+        return limit, None
+    return limit, decode_cursor(cursor, queryset.model, fields)
+
+
+def encode_cursor(row, fields) -> str:
+    """Encode the position of `row`, a model instance or a .values() dict"""
+    values = []
+    for field in fields:
+        value = row[field] if isinstance(row, dict) else getattr(row, field)
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, model, fields) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(fields):
+            raise ValueError
+        return [model._meta.get_field(f).to_python(v) for f, v in zip(fields, values)]
+    except Exception:
+        raise InvalidPage("Invalid cursor")
+
+
+def _seek(fields, position) -> Q:
+    """Rows strictly after `position` in the ascending order of `fields`"""
+    condition = Q()
+    for i, field in enumerate(fields):
+        step = Q(**{f"{field}__gt": position[i]})
+        for previous, value in zip(fields[:i], position[:i]):
+            step &= Q(**{previous: value})
+        condition |= step
+    return condition
+
+
+def paginate(queryset, fields, limit: int, position=None) -> tuple:
+    """
+    Return one page of `queryset` ordered by `fields`, and the cursor of the
+    next page (None on the last page).
+    """
+    queryset = queryset.order_by(*fields)
+    if position is not None:
+        queryset = queryset.filter(_seek(fields, position))
+
+    rows = list(queryset[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], fields)
@@ -1,11 +1,81 @@
 from rest_framework import serializers
-from .models import Member, MemberCategory, MemberApplication, Project, ProjectMember
+from .images import variant_urls
+from .models import (
+    ImageJob,
+    Member,
+    MemberCategory,
+    MemberApplication,
+    Project,
+    ProjectMember,
+    Semester,
+)
+
+
+def requested_fields(request) -> dict:
+    """
+    Parse the comma separated ?fields= and ?omit= query parameters into
+    keyword arguments for a DynamicFieldsMixin serializer.
+    """
+    requested = {}
+    for param in ("fields", "omit"):
+        value = request.query_params.get(param)
+        if value is not None:
+            requested[param] = [name.strip() for name in value.split(",") if name]
+    return requested
+
+
+class DynamicFieldsMixin:
+    """
+    Takes additional `fields` and `omit` arguments that restrict which fields
+    are rendered. Unknown field names are ignored.
+    """
+
+    def __init__(self, *args, fields=None, omit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in omit or ():
+            self.fields.pop(name, None)
+
+    @classmethod
+    def rendered_fields(cls, fields=None, omit=None) -> list:
+        """The names of the fields rendered for the given `fields` and `omit`"""
+        return list(cls(fields=fields, omit=omit).fields)
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Renders the variants stored in a `*_variants` field as
+    {format: {width: url}}, ready to build a `srcset` from.
+    """
+
+    def __init__(self, model, image_field: str, **kwargs):
+        self.storage = model._meta.get_field(image_field).storage
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return variant_urls(self.storage, value)
 
 
 class ProjectBriefSerializer(serializers.ModelSerializer):
+    logo_variants = ImageVariantsField(Project, "logo")
+
     class Meta:
         model = Project
-        fields = ("id", "name", "logo", "hours_a_week", "github_link")
+        fields = (
+            "id",
+            "name",
+            "logo",
+            "logo_variants",
+            "logo_width",
+            "logo_height",
+            "logo_size",
+            "logo_placeholder",
+            "hours_a_week",
+            "github_link",
+        )
 
 
 class ProjectMemberSerializer(serializers.ModelSerializer):
@@ -22,43 +92,133 @@ class ProjectMemberSerializer(serializers.ModelSerializer):
         )
 
 
-class MemberSerializer(serializers.ModelSerializer):
+class MemberSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     category = serializers.StringRelatedField(many=True)
     project_memberships = ProjectMemberSerializer(
         many=True,
         read_only=True,
     )
+    image_variants = ImageVariantsField(Member, "image")
 
     class Meta:
         model = Member
         fields = "__all__"
 
 
-class FindMemberSerializer(serializers.Serializer):
+class PageSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        required=False, help_text="Page size, enables cursor pagination"
+    )
+    cursor = serializers.CharField(
+        required=False, help_text="The 'next' cursor from the previous page"
+    )
+
+
+class SparseFieldsetSerializer(serializers.Serializer):
+    fields = serializers.CharField(
+        required=False, help_text="Comma separated fields to include"
+    )
+    omit = serializers.CharField(
+        required=False, help_text="Comma separated fields to leave out"
+    )
+
+
+class ApplicationFilterSerializer(serializers.Serializer):
+    since = serializers.DateField(
+        required=False, help_text="Only applications sent on or after this date"
+    )
+    until = serializers.DateField(
+        required=False, help_text="Only applications sent on or before this date"
+    )
+    lead = serializers.BooleanField(
+        required=False, help_text="Only applicants who do or do not want to lead"
+    )
+    project = serializers.CharField(
+        required=False, help_text="Only applicants who want to join this project"
+    )
+    q = serializers.CharField(
+        required=False,
+        help_text="Words to look for in names, email, phone, projects and application",
+    )
+
+
+class SeasonSerializer(serializers.Serializer):
+    # A fall season ends on January 1st of the next year, which must exist
+    year = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=9998,
+        help_text="Defaults to the current year",
+    )
+    semester = serializers.ChoiceField(
+        choices=Semester.choices,
+        required=False,
+        help_text="SP (January to June) or FA (July to December), defaults to the current one",
+    )
+
+
+class FindApplicationsSerializer(PageSerializer, ApplicationFilterSerializer):
+    pass
+
+
+class ExportApplicationsSerializer(ApplicationFilterSerializer):
+    output = serializers.ChoiceField(
+        choices=["csv", "ndjson"], default="csv", help_text="File format"
+    )
+
+
+class FindMemberSerializer(PageSerializer, SparseFieldsetSerializer):
     member_type = serializers.CharField()
 
 
+class FindMembersByCategoriesSerializer(SparseFieldsetSerializer):
+    member_type = serializers.ListField(
+        child=serializers.CharField(),
+        required=False,
+        help_text="Categories to group by, repeat for several. Leave out for all",
+    )
+
+
 class MemberImageUploadSerializer(serializers.Serializer):
-    images = serializers.ListField(child=serializers.ImageField())
+    # The images are checked by the image worker, not while handling the upload
+    images = serializers.ListField(child=serializers.FileField())
+
+
+class ImageJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImageJob
+        fields = (
+            "id",
+            "kind",
+            "status",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
 
 
 class MemberApplicationSerializer(serializers.ModelSerializer):
     class Meta:
         model = MemberApplication
-        fields = "__all__"
+        exclude = ("idempotency_key", "payload_hash", "search_vector")
 
     def create(self, validated_data):
         return MemberApplication.objects.create(**validated_data)
 
 
 class MemberCategorySerializer(serializers.ModelSerializer):
+    member_count = serializers.IntegerField(read_only=True)
+    updated_at = serializers.DateTimeField(read_only=True)
+
     class Meta:
         model = MemberCategory
         fields = "__all__"
 
 
-class ProjectSerializer(serializers.ModelSerializer):
-    leaders = MemberSerializer(many=True, read_only=True)
+class ProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    logo_variants = ImageVariantsField(Project, "logo")
 
     class Meta:
         model = Project
@@ -0,0 +1,62 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import analytics, caching, images, jobs
+from .models import (
+    Member,
+    MemberApplication,
+    MemberCategory,
+    Project,
+    ProjectMember,
+    link_applications,
+)
+
+
+@receiver([post_save, post_delete], sender=Member)
+@receiver([post_save, post_delete], sender=MemberCategory)
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=ProjectMember)
+@receiver(m2m_changed, sender=Member.category.through)
+def invalidate_team_cache(sender, **kwargs):
+    """Any change to the public team data invalidates the cached responses"""
+    caching.invalidate()
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=Project)
+def update_image_variants(sender, instance, update_fields=None, **kwargs):
+    """Queue new image variants when the member image or project logo changed"""
+    image_field, _ = images.IMAGE_FIELDS[sender]
+    if update_fields is not None and image_field not in update_fields:
+        return
+    if images.needs_variants(instance):
+        jobs.enqueue_variants(instance)
+
+
+@receiver(post_save, sender=MemberApplication)
+def update_project_choices(sender, instance, update_fields=None, **kwargs):
+    """Resolve the names in projects_to_join into ApplicationProjectChoice rows"""
+    if update_fields is not None and "projects_to_join" not in update_fields:
+        return
+    instance.sync_project_choices()
+
+
+@receiver(post_save, sender=Project)
+def link_project_applications(sender, instance, update_fields=None, **kwargs):
+    """Applications sent before the project got its name now point to it"""
+    if update_fields is not None and "name" not in update_fields:
+        return
+    instance.link_named_applications()
+
+
+@receiver(post_delete, sender=Project)
+def relink_deleted_project_applications(sender, instance, **kwargs):
+    """Applicants of a deleted project move to another project with its name"""
+    link_applications(instance.name)
+
+
+@receiver([post_save, post_delete], sender=MemberApplication)
+def invalidate_application_statistics(sender, instance, **kwargs):
+    """A changed application changes the statistics of its season"""
+    if instance.date_of_application is not None:
+        analytics.invalidate(instance.date_of_application)
@@ -0,0 +1,57 @@
+"""
+Content-addressed storage for member images and project logos.
+
+Files are named after the SHA-256 of their content, so uploading the same photo
+again reuses the stored file instead of adding `images/foo_XyZ12.jpg`, and a
+name always refers to the same bytes. That makes the files safe to serve with
+immutable caching. Files no row refers to are removed by `manage.py gc_media`.
+"""
+
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+CONTENT_NAME = re.compile(r"(^|/)[0-9a-f]{64}\.\w+$")
+
+
+def is_content_addressed(name: str) -> bool:
+    """Whether `name` was given by ContentAddressedStorage, so never changes"""
+    return bool(CONTENT_NAME.search(name))
+
+
+def content_hash(content) -> str:
+    """SHA-256 hex digest of a django File, leaving it at the start"""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def content_name(self, name: str, content) -> str:
+        """`images/foo.JPG` with content hashing to abc... becomes `images/abc....jpg`"""
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, content_hash(content) + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.content_name(name, content)
+        # Same name means same bytes, so there is nothing to write
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+content_addressed_storage = ContentAddressedStorage()
@@ -1,24 +1,59 @@
+import base64
+import csv
+import io
 import os
+import gzip
+import hashlib
+import importlib
+import smtplib
+import time
 import json
+import re
 import tempfile
+from unittest import mock, skipUnless
 from PIL import Image
 
 from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache
 from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.management import call_command, CommandError
+from django.apps import apps as django_apps
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import TestCase, Client
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 
 
+from cogito import mail as cogito_mail
+from cogito.middleware import brotli
+from team import (
+    analytics,
+    caching,
+    exports,
+    fast_serializers,
+    jobs,
+    outbox,
+    throttling,
+)
 from team.models import (
+    ApplicationProjectChoice,
+    ImageJob,
     Member,
     MemberApplication,
     MemberCategory,
+    OutgoingEmail,
     Project,
     ProjectMember,
     Semester,
 )
+from team.serializers import MemberSerializer
 
 
 base = "/api/"
@@ -179,8 +214,500 @@ class MemberWithProjectsTests(TestCase):
             self.assertIn("semester", project_member)
 
 
+class GetMembersQueryBudgetTests(TestCase):
+    """The members listing must not issue queries per member."""
+
+    # members, categories and project memberships (joined with their project)
+    QUERY_BUDGET = 3
+
+    def setUp(self):
+        self.url = f"{base}members-by-type/"
+        self.category = MemberCategory.objects.create(title="Styret")
+        self.projects = [
+            Project.objects.create(
+                name=f"Project {i}", description="Description", hours_a_week=5
+            )
+            for i in range(3)
+        ]
+
+    def _add_members(self, up_to: int):
+        # bulk_create() does not send post_save, so invalidate by hand
+        caching.invalidate()
+        start = Member.objects.count()
+        members = Member.objects.bulk_create(
+            Member(order=i, name=f"Member {i}", title="Member")
+            for i in range(start, up_to)
+        )
+        Member.category.through.objects.bulk_create(
+            Member.category.through(member_id=m.order, membercategory=self.category)
+            for m in members
+        )
+        ProjectMember.objects.bulk_create(
+            ProjectMember(
+                member=m,
+                project=self.projects[m.order % len(self.projects)],
+                role="Developer",
+                year=2024,
+            )
+            for m in members
+        )
+
+    def test_query_count_is_constant(self):
+        for size in (10, 100, 1000):
+            self._add_members(size)
+            for member_type in ("Alle Medlemmer", "Styret"):
+                with self.subTest(size=size, member_type=member_type):
+                    with self.assertNumQueries(self.QUERY_BUDGET):
+                        response = self.client.get(
+                            self.url, {"member_type": member_type}
+                        )
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertEqual(len(response.json()), size)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = f"{base}members-by-type/"
+        self.category = MemberCategory.objects.create(title="Styret")
+        self.alice = Member.objects.create(order=1, name="Alice", title="CEO")
+        self.alice.category.set([self.category])
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get(self.url, {"member_type": "Styret"})
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {"member_type": "Styret"})
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(caching.stats()["hits"], 1)
+        self.assertEqual(caching.stats()["misses"], 1)
+
+    def test_cache_is_keyed_per_member_type(self):
+        self.client.get(self.url, {"member_type": "Styret"})
+        response = self.client.get(self.url, {"member_type": "Alle Medlemmer"})
+
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_save_invalidates_cache(self):
+        self.client.get(self.url, {"member_type": "Styret"})
+        self.alice.title = "Chair"
+        self.alice.save()
+
+        response = self.client.get(self.url, {"member_type": "Styret"})
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()[0]["title"], "Chair")
+
+    def test_category_change_invalidates_cache(self):
+        self.client.get(self.url, {"member_type": "Styret"})
+        self.alice.category.clear()
+
+        response = self.client.get(self.url, {"member_type": "Styret"})
+        self.assertEqual(response.json(), [])
+
+    def test_project_membership_change_invalidates_cache(self):
+        self.client.get(self.url, {"member_type": "Styret"})
+        project = Project.objects.create(
+            name="Project", description="Description", hours_a_week=5
+        )
+        ProjectMember.objects.create(member=self.alice, project=project, role="Lead")
+
+        response = self.client.get(self.url, {"member_type": "Styret"})
+        memberships = response.json()[0]["project_memberships"]
+        self.assertEqual(memberships[0]["project"]["name"], "Project")
+
+    def test_project_listing_is_cached(self):
+        Project.objects.create(
+            name="Project", description="Description", hours_a_week=5
+        )
+        first = self.client.get(f"{base}projects/")
+        second = self.client.get(f"{base}projects/")
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.json()[0]["name"], "Project")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = f"{base}members-by-type/"
+        self.query = {"member_type": "Alle Medlemmer"}
+        Member.objects.create(order=1, name="Alice", title="CEO")
+
+    def test_matching_etag_returns_not_modified(self):
+        first = self.client.get(self.url, self.query)
+        with self.assertNumQueries(0):
+            second = self.client.get(
+                self.url, self.query, HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_if_modified_since_returns_not_modified(self):
+        first = self.client.get(self.url, self.query)
+        second = self.client.get(
+            self.url, self.query, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since_sees_category_changes_and_deletes(self):
+        styret = MemberCategory.objects.create(title="Styret")
+        bob = Member.objects.create(order=2, name="Bob", title="CTO")
+        with mock.patch("team.caching.time.time", return_value=1_700_000_000):
+            caching.invalidate()
+            first = self.client.get(self.url, self.query)
+
+        # Neither changes any updated_at
+        bob.category.add(styret)
+        second = self.client.get(
+            self.url, self.query, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+
+        with mock.patch("team.caching.time.time", return_value=1_700_000_000):
+            caching.invalidate()
+            first = self.client.get(self.url, self.query)
+        bob.delete()
+        second = self.client.get(
+            self.url, self.query, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(second.json()), 1)
+
+    def test_stale_etag_returns_full_response(self):
+        first = self.client.get(self.url, self.query)
+        Member.objects.create(order=2, name="Bob", title="CTO")
+        second = self.client.get(self.url, self.query, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(len(second.json()), 2)
+
+    def test_categories_and_projects_have_etags(self):
+        MemberCategory.objects.create(title="Styret")
+        for url in (f"{base}member/category", f"{base}projects/"):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+                self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        Member.objects.bulk_create(
+            Member(order=i, name=f"Member {i}", title="Member") for i in range(1, 12)
+        )
+
+        # Give several applications the same timestamp to exercise the id tie-break
+        MemberApplication.objects.bulk_create(
+            MemberApplication(
+                first_name=f"Applicant {i}",
+                last_name="Doe",
+                email=f"applicant{i}@example.com",
+                phone_number="12345678",
+            )
+            for i in range(7)
+        )
+        MemberApplication.objects.update(date_of_application=timezone.now())
+
+    def _walk(self, url, params):
+        seen, cursor = [], None
+        while True:
+            query = dict(params, limit=3)
+            if cursor:
+                query["cursor"] = cursor
+            response = self.client.get(url, query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            page = response.json()
+            self.assertLessEqual(len(page["results"]), 3)
+            seen.extend(page["results"])
+            cursor = page["next"]
+            if cursor is None:
+                return seen
+
+    def test_members_pages_cover_every_member_once(self):
+        seen = self._walk(f"{base}members-by-type/", {"member_type": "Alle Medlemmer"})
+
+        self.assertEqual([m["order"] for m in seen], list(range(1, 12)))
+
+    def test_applications_pages_are_stable_on_ties(self):
+        self.client.login(username="testuser", password="testpass")
+        seen = self._walk(f"{base}applications/", {})
+
+        ids = [a["id"] for a in seen]
+        self.assertEqual(
+            ids, sorted(MemberApplication.objects.values_list("id", flat=True))
+        )
+
+    def test_unpaginated_responses_are_unchanged(self):
+        response = self.client.get(
+            f"{base}members-by-type/", {"member_type": "Alle Medlemmer"}
+        )
+
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 11)
+
+    def test_invalid_cursor_and_limit(self):
+        url = f"{base}members-by-type/"
+        for params in ({"cursor": "not-a-cursor"}, {"limit": 0}, {"limit": "ten"}):
+            with self.subTest(params=params):
+                response = self.client.get(
+                    url, dict(params, member_type="Alle Medlemmer")
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = f"{base}members-by-type/"
+        category = MemberCategory.objects.create(title="Styret")
+        alice = Member.objects.create(order=1, name="Alice", title="CEO")
+        alice.category.set([category])
+        self.project = Project.objects.create(
+            name="Project", description="Description", hours_a_week=5
+        )
+        ProjectMember.objects.create(member=alice, project=self.project, role="Lead")
+
+    def test_fields_selects_member_fields(self):
+        response = self.client.get(
+            self.url, {"member_type": "Styret", "fields": "name,title,image,category"}
+        )
+
+        self.assertEqual(
+            set(response.json()[0]), {"name", "title", "image", "category"}
+        )
+        self.assertEqual(response.json()[0]["category"], ["Styret"])
+
+    def test_omit_drops_member_fields(self):
+        response = self.client.get(
+            self.url, {"member_type": "Styret", "omit": "email,project_memberships"}
+        )
+
+        member = response.json()[0]
+        self.assertNotIn("email", member)
+        self.assertNotIn("project_memberships", member)
+        self.assertIn("category", member)
+
+    def test_unrendered_relations_are_not_prefetched(self):
+        # members only
+        with self.assertNumQueries(1):
+            self.client.get(
+                self.url, {"member_type": "Alle Medlemmer", "fields": "name,title"}
+            )
+
+    def test_fields_selects_project_fields(self):
+        # projects only, without their members
+        with self.assertNumQueries(1):
+            response = self.client.get(f"{base}projects/", {"fields": "id,name"})
+
+        self.assertEqual(response.json(), [{"id": self.project.id, "name": "Project"}])
+
+
+class MemberFastPathParityTests(TestCase):
+    """The fast member listing must render exactly what MemberSerializer does"""
+
+    def setUp(self):
+        cache.clear()
+        styret = MemberCategory.objects.create(title="Styret")
+        alumni = MemberCategory.objects.create(title="Alumni")
+        web = Project.objects.create(
+            name="Web", description="Website", hours_a_week=5, logo="images/web.png"
+        )
+        game = Project.objects.create(name="Game AI", description="AI", hours_a_week=8)
+
+        alice = Member.objects.create(
+            order=1,
+            name="Alice",
+            title="CEO",
+            image="images/alice.jpg",
+            email="alice@example.com",
+            github="https://github.com/alice",
+        )
+        alice.category.set([styret, alumni])
+        bob = Member.objects.create(order=2, name="Bøb", title="CTO", image="")
+        bob.category.set([styret])
+        Member.objects.create(order=3, name="Charlie", image=None)
+
+        for project, year, semester in (
+            (web, 2021, Semester.SPRING),
+            (game, 2021, Semester.FALL),
+            (web, 2023, Semester.FALL),
+        ):
+            ProjectMember.objects.create(
+                member=alice, project=project, year=year, semester=semester, role="Dev"
+            )
+        ProjectMember.objects.create(member=bob, project=game, role="Lead")
+
+    def _assert_parity(self, queryset, **requested):
+        fields = MemberSerializer.rendered_fields(**requested)
+        expected = MemberSerializer(
+            queryset.with_related(fields), many=True, **requested
+        ).data
+        actual = fast_serializers.serialize_members(
+            fast_serializers.member_values(queryset, fields), fields
+        )
+        self.assertEqual(
+            json.dumps(actual, cls=DjangoJSONEncoder),
+            json.dumps(expected, cls=DjangoJSONEncoder),
+        )
+
+    def test_parity_all_fields(self):
+        self._assert_parity(Member.objects.all())
+
+    def test_parity_filtered_by_category(self):
+        self._assert_parity(Member.objects.filter(category__title="Styret"))
+
+    def test_parity_sparse_fieldsets(self):
+        self._assert_parity(Member.objects.all(), fields=["name", "image", "category"])
+        self._assert_parity(Member.objects.all(), omit=["project_memberships"])
+
+    def test_endpoint_matches_serializer(self):
+        response = self.client.get(
+            f"{base}members-by-type/", {"member_type": "Alle Medlemmer"}
+        )
+        expected = MemberSerializer(Member.objects.all(), many=True).data
+
+        self.assertEqual(
+            response.content, json.dumps(expected, cls=DjangoJSONEncoder).encode()
+        )
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = f"{base}members-by-type/"
+        self.query = {"member_type": "Alle Medlemmer"}
+        Member.objects.bulk_create(
+            Member(order=i, name=f"Member {i}", title="Member") for i in range(20)
+        )
+
+    def test_gzip_is_negotiated(self):
+        plain = self.client.get(self.url, self.query)
+        compressed = self.client.get(
+            self.url, self.query, HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertEqual(compressed["ETag"], "W/" + plain["ETag"])
+
+    def test_refused_encodings_are_not_used(self):
+        response = self.client.get(
+            self.url, self.query, HTTP_ACCEPT_ENCODING="gzip;q=0, identity"
+        )
+
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_cached_responses_are_compressed_once(self):
+        self.client.get(self.url, self.query, HTTP_ACCEPT_ENCODING="gzip")
+        with mock.patch("cogito.middleware.compress") as compress:
+            response = self.client.get(
+                self.url, self.query, HTTP_ACCEPT_ENCODING="gzip"
+            )
+
+        compress.assert_not_called()
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_weak_etag_revalidates(self):
+        first = self.client.get(self.url, self.query, HTTP_ACCEPT_ENCODING="gzip")
+        second = self.client.get(
+            self.url,
+            self.query,
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=first["ETag"],
+        )
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_html_pages_are_not_compressed(self):
+        response = self.client.get("/admin/login/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b"csrfmiddlewaretoken", response.content)
+        self.assertNotIn("Content-Encoding", response)
+
+    @skipUnless(brotli, "brotli is not installed")
+    def test_brotli_is_preferred(self):
+        response = self.client.get(
+            self.url, self.query, HTTP_ACCEPT_ENCODING="gzip, br"
+        )
+
+        self.assertEqual(response["Content-Encoding"], "br")
+
+
+class MembersByCategoriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = f"{base}members-by-categories/"
+        styret = MemberCategory.objects.create(title="Styret")
+        web = MemberCategory.objects.create(title="Web")
+        MemberCategory.objects.create(title="Empty")
+
+        alice = Member.objects.create(order=1, name="Alice", title="CEO")
+        alice.category.set([styret, web])
+        bob = Member.objects.create(order=2, name="Bob", title="Developer")
+        bob.category.set([web])
+        Member.objects.create(order=3, name="Charlie", title="Alumnus")
+
+    def test_selected_categories(self):
+        response = self.client.get(self.url, {"member_type": ["Styret", "Web"]})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual([m["name"] for m in data["members"]], ["Alice", "Bob"])
+        self.assertEqual(data["groups"], {"Styret": [1], "Web": [1, 2]})
+
+    def test_all_categories(self):
+        data = self.client.get(self.url).json()
+
+        # Charlie is in no category, so no group would refer to him
+        self.assertEqual([m["name"] for m in data["members"]], ["Alice", "Bob"])
+        self.assertEqual(data["groups"], {"Empty": [], "Styret": [1], "Web": [1, 2]})
+
+    def test_order_is_always_rendered(self):
+        data = self.client.get(self.url, {"fields": "name"}).json()
+        self.assertEqual(
+            data["members"],
+            [{"order": 1, "name": "Alice"}, {"order": 2, "name": "Bob"}],
+        )
+
+        data = self.client.get(self.url, {"omit": "order"}).json()
+        self.assertEqual([m["order"] for m in data["members"]], [1, 2])
+
+    def test_members_match_members_by_type(self):
+        data = self.client.get(self.url, {"member_type": "Web"}).json()
+        by_type = self.client.get(
+            f"{base}members-by-type/", {"member_type": "Web"}
+        ).json()
+
+        self.assertEqual(data["members"], by_type)
+
+    def test_sparse_fieldsets_and_query_count(self):
+        # category titles, members, their categories and memberships, however
+        # many categories there are
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {"omit": "category"})
+
+        self.assertNotIn("category", response.json()["members"][0])
+        self.assertEqual(response.json()["groups"]["Web"], [1, 2])
+
+
 class ApplyTestCase(TestCase):
     def setUp(self):
+        # The throttle buckets live in the cache
+        cache.clear()
         self.client = Client()
         self.url = f"{base}apply/"
 
@@ -199,11 +726,28 @@ class ApplyTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["message"], "Application sent in successfully")
 
+        # The email is queued, and sent by the email worker
+        self.assertEqual(len(mail.outbox), 0)
+        call_command("email_worker", "--once", stdout=io.StringIO())
+
         # Check that an email was sent
         self.assertEqual(len(mail.outbox), 1)
         self.assertIn("Application Received by Cogito NTNU", mail.outbox[0].subject)
         self.assertIn(f"Dear John Doe,", mail.outbox[0].body)
 
+    def test_apply_does_not_wait_for_smtp(self):
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=smtplib.SMTPServerDisconnected("down"),
+        ) as send_messages:
+            response = self.client.post(self.url, self.valid_payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        send_messages.assert_not_called()
+        self.assertEqual(
+            OutgoingEmail.objects.get().recipients, ["johndoe@example.com"]
+        )
+
     def test_apply_invalid_email(self):
         invalid_payload = self.valid_payload.copy()
         invalid_payload["email"] = "invalid-email"
@@ -403,21 +947,123 @@ class ApplyTestCase(TestCase):
 
     def test_valid_duplicate_applications(self):
         """
-        Applications with the same fields should be allowed as one might accidentally send in the same application twice,
-        or send in an application with the same information as a previous one.
+        Sending in the same application twice, like with a double-click or a retry,
+        should succeed both times but only register it once.
         """
         response1 = self.client.post(self.url, self.valid_payload, format="json")
         self.assertEqual(response1.status_code, status.HTTP_200_OK)
 
         response2 = self.client.post(self.url, self.valid_payload, format="json")
         self.assertEqual(response2.status_code, status.HTTP_200_OK)
+        self.assertEqual(response2.data, response1.data)
+        self.assertEqual(response2["Idempotent-Replayed"], "true")
 
-        # Check that the applications was created in the database
-        self.assertTrue(
+        # Check that the application was created once, with one email
+        self.assertEqual(
+            MemberApplication.objects.count(),
+            self.amount_of_applications_before_test + 1,
+        )
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+    def test_resubmission_ignores_case_and_whitespace(self):
+        self.client.post(self.url, self.valid_payload, format="json")
+        payload = self.valid_payload.copy()
+        payload["email"] = "JohnDoe@Example.com"
+        payload["first_name"] = " John "
+        self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(
+            MemberApplication.objects.count(),
+            self.amount_of_applications_before_test + 1,
+        )
+
+    def test_same_application_after_duplicate_window(self):
+        self.client.post(self.url, self.valid_payload, format="json")
+        MemberApplication.objects.update(
+            date_of_application=timezone.now()
+            - timezone.timedelta(seconds=settings.APPLY_DUPLICATE_WINDOW + 1)
+        )
+
+        response = self.client.post(self.url, self.valid_payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(
             MemberApplication.objects.count(),
             self.amount_of_applications_before_test + 2,
         )
 
+    def test_idempotency_key(self):
+        response1 = self.client.post(
+            self.url, self.valid_payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        response2 = self.client.post(
+            self.url, self.valid_payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(response1.status_code, status.HTTP_200_OK)
+        self.assertEqual(response2.status_code, status.HTTP_200_OK)
+        self.assertEqual(response2["Idempotent-Replayed"], "true")
+        application = MemberApplication.objects.get(idempotency_key="abc")
+        self.assertEqual(
+            MemberApplication.objects.count(),
+            self.amount_of_applications_before_test + 1,
+        )
+
+        # A new key is a new application, even with the same content
+        response3 = self.client.post(
+            self.url, self.valid_payload, format="json", HTTP_IDEMPOTENCY_KEY="def"
+        )
+        self.assertNotIn("Idempotent-Replayed", response3)
+        self.assertNotEqual(
+            MemberApplication.objects.get(idempotency_key="def").pk, application.pk
+        )
+
+    def test_idempotency_key_reused_for_other_application(self):
+        self.client.post(
+            self.url, self.valid_payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        payload = self.valid_payload.copy()
+        payload["about"] = "Something else"
+        response = self.client.post(
+            self.url, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(
+            MemberApplication.objects.count(),
+            self.amount_of_applications_before_test + 1,
+        )
+
+    def test_resubmission_lookup_uses_index(self):
+        self.client.post(self.url, self.valid_payload, format="json")
+        application = MemberApplication.objects.get()
+        # Other applications in the window, so the planner does not pick the
+        # date index when both cost about the same on a near-empty table
+        MemberApplication.objects.bulk_create(
+            MemberApplication(
+                first_name="Other",
+                last_name=str(i),
+                email=f"other{i}@example.com",
+                phone_number="1234567890",
+                about="-",
+                payload_hash=f"{i:064x}",
+            )
+            for i in range(200)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE team_memberapplication")
+            cursor.execute("SET enable_seqscan = off")
+            plan = (
+                MemberApplication.objects.filter(
+                    payload_hash=application.payload_hash,
+                    date_of_application__gte=application.date_of_application,
+                )
+                .order_by("-date_of_application")
+                .explain()
+            )
+            cursor.execute("RESET enable_seqscan")
+        self.assertIn("team_application_hash_idx", plan)
+
     def test_valid_email_with_subdomain(self):
         payload = self.valid_payload.copy()
         payload["email"] = "user@mail.example.com"
@@ -497,9 +1143,550 @@ class ApplyTestCase(TestCase):
         )
 
 
-class UpdateMemberImageViewTests(TestCase):
+class ApplicationFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.client.login(username="testuser", password="testpass")
+        self.url = f"{base}applications/"
+        for name in ("Cogito", "Web"):
+            Project.objects.create(name=name, description=name, hours_a_week=5)
+        for name, lead, projects, sent in (
+            ("Ola", True, ["Cogito", "Web"], "2024-01-15T10:00"),
+            ("Kari", False, ["Web"], "2024-08-20T23:30"),
+            ("Per", None, [], "2024-08-21T00:30"),
+        ):
+            application = MemberApplication.objects.create(
+                first_name=name,
+                last_name="Nordmann",
+                email=f"{name.lower()}@example.com",
+                phone_number="12345678",
+                about=f"{name} likes robots",
+                lead=lead,
+                projects_to_join=projects,
+            )
+            MemberApplication.objects.filter(pk=application.pk).update(
+                date_of_application=timezone.make_aware(
+                    timezone.datetime.fromisoformat(sent)
+                )
+            )
+
+    def _names(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(a["first_name"] for a in response.json())
+
+    def test_filters(self):
+        cases = (
+            ({}, ["Kari", "Ola", "Per"]),
+            ({"since": "2024-08-01"}, ["Kari", "Per"]),
+            ({"until": "2024-08-20"}, ["Kari", "Ola"]),
+            ({"since": "2024-08-21", "until": "2024-08-21"}, ["Per"]),
+            ({"lead": "true"}, ["Ola"]),
+            ({"lead": "false"}, ["Kari"]),
+            ({"project": "Web"}, ["Kari", "Ola"]),
+            ({"project": "Cogito"}, ["Ola"]),
+            ({"project": "Cog"}, []),
+            ({"q": "kari"}, ["Kari"]),
+            ({"q": "ROBOTS"}, ["Kari", "Ola", "Per"]),
+            ({"project": "Web", "lead": "false", "since": "2024-08-01"}, ["Kari"]),
+        )
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(self._names(params), expected)
+
+    def test_filters_with_pagination(self):
+        response = self.client.get(self.url, {"project": "Web", "limit": 1})
+        page = response.json()
+        self.assertEqual([a["first_name"] for a in page["results"]], ["Ola"])
+
+        response = self.client.get(
+            self.url, {"project": "Web", "limit": 1, "cursor": page["next"]}
+        )
+        page = response.json()
+        self.assertEqual([a["first_name"] for a in page["results"]], ["Kari"])
+        self.assertIsNone(page["next"])
+
+    def test_invalid_filters(self):
+        for params in ({"since": "yesterday"}, {"lead": "maybe"}, {"limit": "ten"}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        response = self.client.get(self.url, {"project": "Web"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_filters_use_indexes(self):
+        applications = MemberApplication.objects.filter_by
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+            project_plan = applications(project="Web").explain()
+            date_plan = applications(
+                since=timezone.datetime(2024, 8, 1).date()
+            ).explain()
+            cursor.execute("RESET enable_seqscan")
+        self.assertIn("team_choice_project_rank_idx", project_plan)
+        self.assertIn("team_application_date_id_idx", date_plan)
+
+
+class ApplicationProjectChoiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.web = Project.objects.create(name="Web", description="Web", hours_a_week=5)
+        self.ai = Project.objects.create(name="AI", description="AI", hours_a_week=5)
+        # Another project with the same name, the first one is picked
+        Project.objects.create(name="web", description="Web", hours_a_week=5)
+
+    def _apply(self, projects):
+        return MemberApplication.objects.create(
+            first_name="Ola",
+            last_name="Nordmann",
+            email="ola@example.com",
+            phone_number="12345678",
+            projects_to_join=projects,
+        )
+
+    def _choices(self, application):
+        return list(application.project_choices.values_list("project", "rank"))
+
+    def test_names_are_resolved_on_create(self):
+        application = self._apply([" ai ", "Unknown", "WEB", "AI", 42])
+
+        self.assertEqual(
+            self._choices(application), [(self.ai.pk, 1), (self.web.pk, 3)]
+        )
+        # The submitted names are kept as they were
+        self.assertEqual(
+            application.projects_to_join, [" ai ", "Unknown", "WEB", "AI", 42]
+        )
+
+    def test_applying_through_the_api(self):
+        response = self.client.post(
+            f"{base}apply/",
+            {
+                "first_name": "Kari",
+                "last_name": "Nordmann",
+                "email": "kari@example.com",
+                "phone_number": "12345678",
+                "about": "Hello",
+                "projects_to_join": ["Web", "AI"],
+            },
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        application = MemberApplication.objects.get(email="kari@example.com")
+        self.assertEqual(
+            self._choices(application), [(self.web.pk, 1), (self.ai.pk, 2)]
+        )
+
+    def test_choices_follow_changes(self):
+        application = self._apply(["Web"])
+        application.projects_to_join = ["AI", "Web"]
+        application.save()
+        self.assertEqual(
+            self._choices(application), [(self.ai.pk, 1), (self.web.pk, 2)]
+        )
+
+        application.projects_to_join = []
+        application.save(update_fields=["lead"])
+        self.assertEqual(len(self._choices(application)), 2)
+
+        application.delete()
+        self.assertFalse(ApplicationProjectChoice.objects.exists())
+
+    def test_filter_resolves_names_like_the_applicants_choices(self):
+        application = self._apply(["web"])
 
+        for name in ("Web", "web", "WEB", " web "):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    list(MemberApplication.objects.filter_by(project=name)),
+                    [application],
+                )
+
+    def test_filter_survives_a_rename(self):
+        application = self._apply(["Web"])
+        self.web.name = "Website"
+        self.web.save()
+
+        self.assertEqual(
+            list(MemberApplication.objects.filter_by(project="Website")), [application]
+        )
+        self.assertFalse(MemberApplication.objects.filter_by(project="Web").exists())
+
+    def test_project_created_after_the_application(self):
+        application = self._apply(["AI", " later "])
+        later = Project.objects.create(name="Later", description="-", hours_a_week=5)
+
+        self.assertEqual(self._choices(application), [(self.ai.pk, 1), (later.pk, 2)])
+        self.assertEqual(
+            list(MemberApplication.objects.filter_by(project="Later")), [application]
+        )
+
+    def test_renamed_project_links_new_name_and_keeps_old_choices(self):
+        old_name = self._apply(["AI"])
+        new_name = self._apply(["Machine Learning"])
+        self.ai.name = "Machine Learning"
+        self.ai.save()
+
+        self.assertEqual(self._choices(new_name), [(self.ai.pk, 1)])
+        # Saving the application again keeps the choice made under the old name
+        old_name = MemberApplication.objects.get(pk=old_name.pk)
+        old_name.lead = True
+        old_name.save()
+        self.assertEqual(self._choices(old_name), [(self.ai.pk, 1)])
+
+    def test_applications_are_only_scanned_when_the_name_changes(self):
+        with mock.patch("team.models.link_applications") as link:
+            project = Project.objects.get(pk=self.ai.pk)
+            project.description = "Artificial intelligence"
+            project.save()
+            link.assert_not_called()
+
+            project.name = "Machine Learning"
+            project.save()
+            project.save()
+            link.assert_called_once_with("Machine Learning")
+
+    def test_deleted_project(self):
+        application = self._apply(["Web", "AI"])
+        younger_web = Project.objects.get(name="web")
+
+        # Applicants move to the remaining project with the same name
+        self.web.delete()
+        self.assertEqual(
+            self._choices(application), [(younger_web.pk, 1), (self.ai.pk, 2)]
+        )
+
+        # Without any, they are still found by the name they typed
+        self.ai.delete()
+        self.assertEqual(
+            list(MemberApplication.objects.filter_by(project="ai")), [application]
+        )
+
+    def test_data_migration_resolves_existing_applications(self):
+        padded = Project.objects.create(
+            name=" Robot Arm ", description="-", hours_a_week=5
+        )
+        application = self._apply(["AI", "Nope", "web", "robot arm"])
+        ApplicationProjectChoice.objects.all().delete()
+
+        migration = importlib.import_module(
+            "team.migrations.0023_resolve_project_choices"
+        )
+        migration.resolve_project_choices(django_apps, None)
+
+        # Matched like at runtime, the padded name included
+        self.assertEqual(
+            self._choices(application),
+            [(self.ai.pk, 1), (self.web.pk, 3), (padded.pk, 4)],
+        )
+
+
+class ApplicationSearchTests(TestCase):
     def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            username="testuser", password="testpass"
+        )
+        self.client.login(username="testuser", password="testpass")
+        self.url = f"{base}applications/"
+        for first_name, last_name, about, projects in (
+            ("Kari", "Robotnik", "I like music", ["Web"]),
+            ("Ola", "Nordmann", "I build robots", ["Cogito"]),
+            ("Per", "Hansen", "Nothing in particular", ["Robot Arm"]),
+        ):
+            MemberApplication.objects.create(
+                first_name=first_name,
+                last_name=last_name,
+                email=f"{first_name.lower()}@example.com",
+                phone_number="98765432",
+                about=about,
+                projects_to_join=projects,
+            )
+
+    def _search(self, q):
+        response = self.client.get(self.url, {"q": q})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [a["first_name"] for a in response.json()]
+
+    def test_prefix_and_every_word(self):
+        self.assertEqual(self._search("kar"), ["Kari"])
+        self.assertEqual(self._search("ola nord"), ["Ola"])
+        self.assertEqual(self._search("ola hansen"), [])
+
+    def test_other_fields(self):
+        self.assertEqual(self._search("per@example.com"), ["Per"])
+        self.assertEqual(sorted(self._search("9876")), ["Kari", "Ola", "Per"])
+        self.assertEqual(self._search("cogito"), ["Ola"])
+        self.assertEqual(self._search("music"), ["Kari"])
+
+    def test_names_rank_above_application(self):
+        # Robotnik matches by name, "Robot Arm" by project and "robots" by about
+        self.assertEqual(self._search("robot"), ["Kari", "Per", "Ola"])
+
+    def test_special_characters(self):
+        for q in ("kari'", "'); DROP TABLE team_memberapplication; --", "a & | !b"):
+            with self.subTest(q=q):
+                self._search(q)
+        self.assertEqual(self._search("kari'"), ["Kari"])
+
+    def test_search_uses_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+            plan = MemberApplication.objects.search("robot").explain()
+            cursor.execute("RESET enable_seqscan")
+        self.assertIn("team_application_search_idx", plan)
+
+    def test_vector_follows_updates(self):
+        MemberApplication.objects.filter(first_name="Per").update(about="Synthesizers")
+        self.assertEqual(self._search("synth"), ["Per"])
+
+    def test_search_vector_is_not_exposed(self):
+        response = self.client.get(self.url)
+        self.assertNotIn("search_vector", response.json()[0])
+
+    def test_admin_search_is_ranked(self):
+        url = reverse("admin:team_memberapplication_changelist")
+        response = self.client.get(url, {"q": "robot"})
+        results = response.context["cl"].result_list
+        self.assertEqual([a.first_name for a in results], ["Kari", "Per", "Ola"])
+
+        # Sorting by a column still works
+        response = self.client.get(url, {"q": "robot", "o": "1"})
+        results = response.context["cl"].result_list
+        self.assertEqual([a.first_name for a in results], ["Per", "Ola", "Kari"])
+
+
+class ApplicationStatisticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.client.login(username="testuser", password="testpass")
+        self.url = f"{base}applications/statistics/"
+        for lead, projects, sent in (
+            (True, ["Web", "Cogito"], "2024-08-20T10:00"),
+            (False, ["Cogito", "Web", "AI"], "2024-08-20T23:30"),
+            (None, ["Web"], "2024-08-21T09:00"),
+            (True, "not a list", "2024-09-01T12:00"),
+            # Another season
+            (True, ["Web"], "2024-03-01T12:00"),
+        ):
+            self._apply(lead, projects, sent)
+
+    def _apply(self, lead, projects, sent):
+        application = MemberApplication.objects.create(
+            first_name="Ola",
+            last_name="Nordmann",
+            email="ola@example.com",
+            phone_number="12345678",
+            lead=lead,
+            projects_to_join=projects,
+        )
+        MemberApplication.objects.filter(pk=application.pk).update(
+            date_of_application=timezone.make_aware(
+                timezone.datetime.fromisoformat(sent)
+            )
+        )
+
+    def _get(self, **params):
+        return self.client.get(self.url, {"year": 2024, "semester": "FA", **params})
+
+    def test_statistics(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                "year": 2024,
+                "semester": "FA",
+                "applications": 4,
+                "lead": {"yes": 2, "no": 1, "unknown": 1},
+                "projects": [
+                    {"project": "Web", "ranks": [2, 1, 0], "applications": 3},
+                    {"project": "Cogito", "ranks": [1, 1, 0], "applications": 2},
+                    {"project": "AI", "ranks": [0, 0, 1], "applications": 1},
+                ],
+                "per_day": [
+                    {"date": "2024-08-20", "applications": 2},
+                    {"date": "2024-08-21", "applications": 1},
+                    {"date": "2024-09-01", "applications": 1},
+                ],
+            },
+        )
+
+    def test_other_and_empty_seasons(self):
+        response = self._get(semester="SP")
+        self.assertEqual(response.json()["applications"], 1)
+        self.assertEqual(
+            response.json()["projects"],
+            [{"project": "Web", "ranks": [1], "applications": 1}],
+        )
+
+        response = self._get(year=2020)
+        self.assertEqual(response.json()["applications"], 0)
+        self.assertEqual(response.json()["projects"], [])
+
+    def test_defaults_to_current_season(self):
+        response = self.client.get(self.url)
+        year, semester = analytics.season_of(timezone.now())
+        self.assertEqual(response.json()["year"], year)
+        self.assertEqual(response.json()["semester"], semester)
+
+    def test_cached_per_season(self):
+        self.assertEqual(self._get()["X-Cache"], "MISS")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._get()["X-Cache"], "HIT")
+        self.assertFalse(
+            any("team_memberapplication" in q["sql"] for q in queries.captured_queries)
+        )
+        self.assertEqual(self._get(semester="SP")["X-Cache"], "MISS")
+
+    def test_saving_an_application_invalidates_its_season(self):
+        self._get()
+        self._get(semester="SP")
+        with mock.patch("django.utils.timezone.now") as now:
+            now.return_value = timezone.make_aware(timezone.datetime(2024, 10, 1, 12))
+            self.client.post(
+                f"{base}apply/",
+                {
+                    "first_name": "Kari",
+                    "last_name": "Nordmann",
+                    "email": "kari@example.com",
+                    "phone_number": "12345678",
+                    "about": "Hello",
+                    "projects_to_join": ["AI"],
+                },
+                content_type="application/json",
+            )
+
+        response = self._get()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["applications"], 5)
+        self.assertEqual(self._get(semester="SP")["X-Cache"], "HIT")
+
+    def test_invalid_season_and_authentication(self):
+        for params in (
+            {"semester": "WI"},
+            {"year": "next"},
+            {"year": 0},
+            {"year": 9999},
+            {"year": 10000},
+        ):
+            with self.subTest(params=params):
+                response = self._get(**params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.logout()
+        self.assertEqual(self._get().status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ApplicationExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            username="testuser", password="testpass"
+        )
+        self.client.login(username="testuser", password="testpass")
+        self.url = f"{base}applications/export/"
+        Project.objects.create(name="Web", description="Web", hours_a_week=5)
+        self.applications = [
+            MemberApplication.objects.create(
+                first_name=name,
+                last_name="Nordmann",
+                email=f"{name.lower()}@example.com",
+                phone_number="12345678",
+                about="Line one\nline two, with a comma",
+                lead=lead,
+                projects_to_join=projects,
+            )
+            for name, lead, projects in (
+                ("Ola", True, ["Cogito", "Web"]),
+                ("Kari", False, ["Web"]),
+                ("Per", None, []),
+            )
+        ]
+
+    def _content(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("member_applications.csv", response["Content-Disposition"])
+        rows = list(csv.reader(io.StringIO(self._content(response))))
+        self.assertEqual(rows[0], list(exports.FIELDS))
+        self.assertEqual([row[0] for row in rows[1:]], ["Ola", "Kari", "Per"])
+        self.assertEqual(rows[1][7], "Cogito, Web")
+        self.assertEqual(rows[1][8], "Line one line two, with a comma")
+
+    def test_ndjson_export_with_filters(self):
+        response = self.client.get(self.url, {"output": "ndjson", "project": "Web"})
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual([line["first_name"] for line in lines], ["Ola", "Kari"])
+        self.assertEqual(lines[0]["projects_to_join"], ["Cogito", "Web"])
+        self.assertIs(lines[0]["lead"], True)
+
+    def test_header_is_sent_before_the_query(self):
+        response = self.client.get(self.url)
+        content = iter(response.streaming_content)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(next(content).startswith(b"first_name,last_name"))
+        with self.assertNumQueries(1):
+            list(content)
+
+    def test_rows_are_fetched_in_chunks(self):
+        with mock.patch.object(exports, "CHUNK_SIZE", 2):
+            response = self.client.get(self.url, {"output": "ndjson"})
+            chunks = list(response.streaming_content)
+
+        self.assertEqual([chunk.count(b"\n") for chunk in chunks], [2, 1])
+
+    def test_invalid_output_and_authentication(self):
+        response = self.client.get(self.url, {"output": "xlsx"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_admin_actions(self):
+        url = reverse("admin:team_memberapplication_changelist")
+        selected = [self.applications[0].pk, self.applications[2].pk]
+        for action, content_type in (
+            ("export_selected_to_csv", "text/csv"),
+            ("export_selected_to_ndjson", "application/x-ndjson"),
+        ):
+            with self.subTest(action=action):
+                response = self.client.post(
+                    url, {"action": action, "_selected_action": selected}
+                )
+                self.assertEqual(response["Content-Type"], content_type)
+                content = self._content(response)
+                self.assertIn("ola@example.com", content)
+                self.assertIn("per@example.com", content)
+                self.assertNotIn("kari@example.com", content)
+
+
+class UpdateMemberImageViewTests(TestCase):
+    def setUp(self):
+        # The uploads and the variants the worker makes stay out of media/
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
         self.client = Client()
         self.url = f"{base}member/image"
         self.authenticated_user = User.objects.create_user(
@@ -513,11 +1700,10 @@ class UpdateMemberImageViewTests(TestCase):
             name="Jane_Smith", order=2, email="janesmith@cogito-ntnu.no", title="CTO"
         )
 
-    def tearDown(self):
-        # Clean up uploaded images after each test
-        for member in Member.objects.all():
-            if member.image and default_storage.exists(member.image.path):
-                default_storage.delete(member.image.path)
+    def _run_worker(self, response):
+        """Process the queued upload and return its job status"""
+        call_command("image_worker", "--once", stdout=io.StringIO())
+        return self.client.get(response.data["status_url"]).json()
 
     def _create_temp_image(self):
         image = Image.new("RGB", (100, 100))
@@ -538,11 +1724,13 @@ class UpdateMemberImageViewTests(TestCase):
             self.url, {"images": [temp_image1, temp_image2]}, format="multipart"
         )
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn("updated_members", response.data)
-        self.assertIn("members_not_found", response.data)
-        self.assertEqual(len(response.data["updated_members"]), 2)
-        self.assertEqual(len(response.data["members_not_found"]), 0)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "pending")
+
+        job = self._run_worker(response)
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(len(job["result"]["updated_members"]), 2)
+        self.assertEqual(len(job["result"]["members_not_found"]), 0)
 
     def test_update_member_images_partial_success(self):
         temp_image1 = self._create_temp_image()
@@ -556,11 +1744,11 @@ class UpdateMemberImageViewTests(TestCase):
             self.url, {"images": [temp_image1, temp_image2]}, format="multipart"
         )
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn("updated_members", response.data)
-        self.assertIn("members_not_found", response.data)
-        self.assertEqual(len(response.data["updated_members"]), 1)
-        self.assertEqual(len(response.data["members_not_found"]), 1)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        job = self._run_worker(response)
+        self.assertEqual(len(job["result"]["updated_members"]), 1)
+        self.assertEqual(job["result"]["members_not_found"], ["Non_Existent"])
 
     def test_update_member_who_has_image(self):
         temp_image1 = self._create_temp_image()
@@ -571,11 +1759,11 @@ class UpdateMemberImageViewTests(TestCase):
             self.url, {"images": [temp_image1]}, format="multipart"
         )
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn("updated_members", response.data)
-        self.assertIn("members_not_found", response.data)
-        self.assertEqual(len(response.data["updated_members"]), 1)
-        self.assertEqual(len(response.data["members_not_found"]), 0)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        job = self._run_worker(response)
+        self.assertEqual(len(job["result"]["updated_members"]), 1)
+        self.assertEqual(len(job["result"]["members_not_found"]), 0)
 
         # Update the image of the same member
         temp_image2 = self._create_temp_image()
@@ -584,11 +1772,128 @@ class UpdateMemberImageViewTests(TestCase):
         response = self.client.post(
             self.url, {"images": [temp_image2]}, format="multipart"
         )
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn("updated_members", response.data)
-        self.assertIn("members_not_found", response.data)
-        self.assertEqual(len(response.data["updated_members"]), 1)
-        self.assertEqual(len(response.data["members_not_found"]), 0)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        job = self._run_worker(response)
+        self.assertEqual(len(job["result"]["updated_members"]), 1)
+        self.assertEqual(len(job["result"]["members_not_found"]), 0)
+
+    def test_query_count_does_not_grow_with_image_count(self):
+        Member.objects.bulk_create(
+            Member(name=f"Member_{i}", order=10 + i) for i in range(6)
+        )
+        self.client.login(username="testuser", password="testpass")
+
+        query_counts = []
+        for names in (["Member_0", "Member_1"], [f"Member_{i}" for i in range(6)]):
+            images = []
+            for name in names:
+                image = self._create_temp_image()
+                image.name = name + ".jpg"
+                images.append(image)
+            with CaptureQueriesContext(connection) as request_queries:
+                response = self.client.post(
+                    self.url, {"images": images}, format="multipart"
+                )
+            # The upload job only, the variants it queues take one job per image
+            with CaptureQueriesContext(connection) as worker_queries:
+                jobs.run_job(jobs.claim_next())
+            # Counted before the next request resets connection.queries
+            query_counts.append((len(request_queries), len(worker_queries)))
+            call_command("image_worker", "--once", stdout=io.StringIO())
+            job = self.client.get(response.data["status_url"]).json()
+            self.assertEqual(len(job["result"]["updated_members"]), len(names))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertGreater(query_counts[0][1], 0)
+
+    def test_variants_are_queued_per_member(self):
+        self.client.login(username="testuser", password="testpass")
+        images = []
+        for member in (self.member1, self.member2):
+            image = self._create_temp_image()
+            image.name = member.name + ".jpg"
+            images.append(image)
+        response = self.client.post(self.url, {"images": images}, format="multipart")
+        with mock.patch("team.images.generate_variants") as generate_variants:
+            jobs.run_job(jobs.claim_next())
+
+        # Like saving each member, the upload job leaves the resizing to jobs
+        generate_variants.assert_not_called()
+        self.assertEqual(
+            sorted(
+                job.payload["pk"]
+                for job in ImageJob.objects.filter(kind=ImageJob.Kind.VARIANTS)
+            ),
+            [self.member1.pk, self.member2.pk],
+        )
+        self.assertEqual(self._run_worker(response)["status"], "done")
+        self.member1.refresh_from_db()
+        self.assertEqual(self.member1.image_variants["source"], self.member1.image.name)
+
+    def test_upload_does_not_process_images(self):
+        temp_image = self._create_temp_image()
+        temp_image.name = self.member1.name + ".jpg"
+        self.client.login(username="testuser", password="testpass")
+        with mock.patch("team.images.generate_variants") as generate_variants:
+            response = self.client.post(
+                self.url, {"images": [temp_image]}, format="multipart"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        generate_variants.assert_not_called()
+        self.member1.refresh_from_db()
+        self.assertFalse(self.member1.image)
+        # Staged untouched in the temporary MEDIA_ROOT, not in media/
+        staged = os.listdir(os.path.join(self.media_root.name, jobs.UPLOAD_DIRECTORY))
+        self.assertEqual(len(staged), 1)
+        self.assertEqual(
+            self.client.get(response.data["status_url"]).json()["status"], "pending"
+        )
+
+    def test_invalid_image_is_reported_by_the_job(self):
+        not_an_image = SimpleUploadedFile("John_Doe.jpg", b"not an image")
+        self.client.login(username="testuser", password="testpass")
+        response = self.client.post(
+            self.url, {"images": [not_an_image]}, format="multipart"
+        )
+
+        job = self._run_worker(response)
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["result"]["invalid_images"], ["John_Doe.jpg"])
+        self.assertEqual(job["result"]["updated_members"], [])
+        self.member1.refresh_from_db()
+        self.assertFalse(self.member1.image)
+
+    def test_job_status_requires_authentication(self):
+        job = ImageJob.objects.create(kind=ImageJob.Kind.MEMBER_IMAGES)
+        url = f"{base}member/image/{job.id}"
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.login(username="testuser", password="testpass")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.client.get(f"{base}member/image/{job.id + 1}").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_updated_images_invalidate_cached_listing(self):
+        cache.clear()
+        listing = f"{base}members-by-type/"
+        self.client.get(listing, {"member_type": "Alle Medlemmer"})
+
+        temp_image = self._create_temp_image()
+        temp_image.name = self.member1.name + ".jpg"
+        self.client.login(username="testuser", password="testpass")
+        response = self.client.post(
+            self.url, {"images": [temp_image]}, format="multipart"
+        )
+        self._run_worker(response)
+
+        response = self.client.get(listing, {"member_type": "Alle Medlemmer"})
+        john = next(m for m in response.json() if m["name"] == "John_Doe")
+        self.member1.refresh_from_db()
+        self.assertEqual(john["image"], self.member1.image.url)
 
     def test_update_member_images_invalid_request(self):
         self.client.login(username="testuser", password="testpass")
@@ -607,8 +1912,782 @@ class UpdateMemberImageViewTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
-class MemberCategoryViewTests(TestCase):
+class ImageVariantsTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+        self.client = Client()
+        User.objects.create_user(username="testuser", password="testpass")
+        self.member = Member.objects.create(name="John_Doe", order=1, title="CEO")
+        self.member.category.add(MemberCategory.objects.create(title="Styret"))
+
+    def _image(
+        self, name, size=(400, 200), mode="RGB", image_format="JPEG", color="black"
+    ):
+        buffer = tempfile.SpooledTemporaryFile()
+        Image.new(mode, size, color).save(buffer, image_format)
+        buffer.seek(0)
+        return SimpleUploadedFile(name, buffer.read())
+
+    def _run_worker(self):
+        call_command("image_worker", "--once", stdout=io.StringIO())
+
+    def test_uploaded_image_gets_variants(self):
+        self.client.login(username="testuser", password="testpass")
+        self.client.post(
+            f"{base}member/image",
+            {"images": [self._image("John_Doe.jpg")]},
+            format="multipart",
+        )
+        self._run_worker()
+
+        self.member.refresh_from_db()
+        variants = self.member.image_variants
+        self.assertEqual(variants["source"], self.member.image.name)
+        self.assertEqual(set(variants["formats"]), {"webp", "jpeg"})
+        # The 400px wide image is not scaled up to 640px
+        self.assertEqual(set(variants["formats"]["webp"]), {"160", "320"})
+        for path in variants["formats"]["webp"].values():
+            self.assertTrue(default_storage.exists(path))
+        with default_storage.open(variants["formats"]["jpeg"]["160"]) as f:
+            self.assertEqual(Image.open(f).size, (160, 80))
+
+    def test_image_metadata_is_stored(self):
+        self.member.image = self._image("John_Doe.jpg")
+        self.member.save()
+        self._run_worker()
+
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.image_width, 400)
+        self.assertEqual(self.member.image_height, 200)
+        self.assertEqual(
+            self.member.image_size, default_storage.size(self.member.image.name)
+        )
+        prefix = "data:image/jpeg;base64,"
+        self.assertTrue(self.member.image_placeholder.startswith(prefix))
+        placeholder = base64.b64decode(self.member.image_placeholder[len(prefix) :])
+        self.assertEqual(Image.open(io.BytesIO(placeholder)).size, (16, 8))
+
+    def test_serializing_does_not_open_image_files(self):
+        self.member.image = self._image("John_Doe.jpg")
+        self.member.save()
+        project = Project.objects.create(
+            name="Cogito", description="Description", hours_a_week=5
+        )
+        project.logo = self._image("logo.png", mode="RGBA", image_format="PNG")
+        project.save()
+        ProjectMember.objects.create(member=self.member, project=project, role="Dev")
+        self._run_worker()
+
+        with mock.patch("team.storage.ContentAddressedStorage._open") as open_:
+            members = self.client.get(
+                f"{base}members-by-type/", {"member_type": "Alle Medlemmer"}
+            ).json()
+            projects = self.client.get(f"{base}projects/").json()
+            MemberSerializer(Member.objects.all(), many=True).data
+
+        open_.assert_not_called()
+        self.assertEqual(members[0]["image_width"], 400)
+        self.assertEqual(members[0]["image_height"], 200)
+        membership = members[0]["project_memberships"][0]
+        self.assertEqual(membership["project"]["logo_width"], 400)
+        self.assertTrue(membership["project"]["logo_placeholder"])
+        self.assertEqual(projects[0]["logo_height"], 200)
+
+    def test_backfill_images(self):
+        self.member.image = self._image("John_Doe.jpg")
+        self.member.save()
+        # Rows from before the metadata existed
+        ImageJob.objects.all().delete()
+        Member.objects.update(image_width=None, image_variants={})
+
+        out = io.StringIO()
+        call_command("backfill_images", stdout=out)
+
+        self.assertIn("Processed 1 members", out.getvalue())
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.image_width, 400)
+        self.assertIn("webp", self.member.image_variants["formats"])
+
+        out = io.StringIO()
+        call_command("backfill_images", stdout=out)
+        self.assertIn("Processed 0 members", out.getvalue())
+
+    def test_variants_in_member_listing(self):
+        self.member.image = self._image("John_Doe.jpg")
+        self.member.save()
+        self._run_worker()
+
+        response = self.client.get(
+            f"{base}members-by-type/", {"member_type": "Alle Medlemmer"}
+        )
+        variants = response.json()[0]["image_variants"]
+        self.assertTrue(variants["webp"]["320"].startswith("/media/images/variants/"))
+        self.assertTrue(variants["webp"]["320"].endswith(".webp"))
+
+    def test_changed_logo_regenerates_variants(self):
+        project = Project.objects.create(
+            name="Cogito",
+            description="Description",
+            hours_a_week=5,
+            logo=self._image("logo.png", mode="RGBA", image_format="PNG"),
+        )
+        self._run_worker()
+        project.refresh_from_db()
+        first = project.logo_variants["formats"]["jpeg"]["320"]
+
+        project.description = "New description"
+        project.save()
+        self.assertFalse(
+            ImageJob.objects.filter(status=ImageJob.Status.PENDING).exists()
+        )
+
+        project.logo = self._image(
+            "new_logo.png", mode="RGBA", image_format="PNG", color="red"
+        )
+        project.save()
+        self.assertEqual(project.logo_variants["formats"]["jpeg"]["320"], first)
+        self._run_worker()
+        project.refresh_from_db()
+        self.assertNotEqual(project.logo_variants["formats"]["jpeg"]["320"], first)
+
+    def test_unreadable_image_has_no_variants(self):
+        self.member.image = "images/missing.jpg"
+        self.member.save()
+        self._run_worker()
+
+        self.member.refresh_from_db()
+        self.assertEqual(
+            self.member.image_variants,
+            {"source": "images/missing.jpg", "formats": {}},
+        )
+        self.assertIsNone(self.member.image_width)
+        self.assertEqual(self.member.image_placeholder, "")
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.john = Member.objects.create(name="John_Doe", order=1)
+        self.jane = Member.objects.create(name="Jane_Smith", order=2)
+
+    def _image(self, name, color="red"):
+        buffer = io.BytesIO()
+        Image.new("RGB", (50, 50), color).save(buffer, "JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def _stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root.name)
+            for root, _, files in os.walk(self.media_root.name)
+            for name in files
+        )
+
+    def test_files_are_named_by_content(self):
+        self.john.image = self._image("John_Doe.JPG")
+        self.john.save()
 
+        content = self._image("x.jpg").read()
+        self.assertEqual(
+            self.john.image.name,
+            f"images/{hashlib.sha256(content).hexdigest()}.jpg",
+        )
+
+    def test_identical_content_is_stored_once(self):
+        self.john.image = self._image("John_Doe.jpg")
+        self.john.save()
+        self.jane.image = self._image("Jane_Smith.jpg")
+        self.jane.save()
+        self.john.image = self._image("John_Doe.jpg")
+        self.john.save()
+
+        self.assertEqual(self.john.image.name, self.jane.image.name)
+        self.assertEqual(self._stored_files(), [self.john.image.name])
+
+    def test_different_content_gets_different_names(self):
+        self.john.image = self._image("photo.jpg", "red")
+        self.john.save()
+        self.jane.image = self._image("photo.jpg", "blue")
+        self.jane.save()
+
+        self.assertNotEqual(self.john.image.name, self.jane.image.name)
+
+    def test_gc_media_deletes_unreferenced_files(self):
+        self.john.image = self._image("John_Doe.jpg")
+        self.john.save()
+        call_command("image_worker", "--once", stdout=io.StringIO())
+        self.john.refresh_from_db()
+        kept = self._stored_files()
+
+        # A file left behind by an earlier upload
+        self.jane.image = self._image("Jane_Smith.jpg", "blue")
+        self.jane.save()
+        orphan = self.jane.image.name
+        Member.objects.filter(pk=self.jane.pk).update(image=None)
+
+        call_command("gc_media", "--dry-run", "--min-age", "0", stdout=io.StringIO())
+        self.assertIn(orphan, self._stored_files())
+
+        out = io.StringIO()
+        call_command("gc_media", "--min-age", "0", stdout=out)
+        self.assertIn(f"Deleted {orphan}", out.getvalue())
+        self.assertEqual(self._stored_files(), kept)
+        self.assertGreater(len(self.john.image_variants["formats"]["webp"]), 0)
+
+    def test_gc_media_leaves_new_files_alone(self):
+        self.john.image = self._image("John_Doe.jpg")
+        self.john.save()
+        Member.objects.filter(pk=self.john.pk).update(image=None)
+
+        call_command("gc_media", stdout=io.StringIO())
+        self.assertEqual(self._stored_files(), [self.john.image.name])
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.content = bytes(range(256)) * 4
+        self.hashed_name = f"images/{hashlib.sha256(self.content).hexdigest()}.jpg"
+        default_storage.save(self.hashed_name, io.BytesIO(self.content))
+        default_storage.save("images/old_name.jpg", io.BytesIO(self.content))
+        self.url = f"/media/{self.hashed_name}"
+
+    def _body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_serves_file_with_cache_headers(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._body(response), self.content)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertTrue(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Last-Modified"))
+
+    def test_only_content_addressed_files_are_immutable(self):
+        response = self.client.get("/media/images/old_name.jpg")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(self._body(response), self.content[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-16")
+        self.assertEqual(self._body(response), self.content[-16:])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=1000-")
+        self.assertEqual(self._body(response), self.content[1000:])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=5000-")
+        self.assertEqual(
+            response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_outdated_if_range_gets_whole_file(self):
+        response = self.client.get(
+            self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"outdated"'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._body(response), self.content)
+
+    @override_settings(
+        MEDIA_SERVE_MODE="x-accel-redirect", MEDIA_ACCEL_PREFIX="/protected/"
+    )
+    def test_x_accel_redirect_leaves_the_file_to_the_proxy(self):
+        with mock.patch("builtins.open") as open_:
+            response = self.client.get(self.url)
+
+        open_.assert_not_called()
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected/{self.hashed_name}")
+        self.assertEqual(response.content, b"")
+        self.assertIn("immutable", response["Cache-Control"])
+
+    @override_settings(MEDIA_SERVE_MODE="x-sendfile")
+    def test_x_sendfile_leaves_the_file_to_the_proxy(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(
+            response["X-Sendfile"], os.path.join(self.media_root.name, self.hashed_name)
+        )
+        self.assertEqual(response.content, b"")
+
+    def test_missing_and_outside_files_are_not_found(self):
+        self.assertEqual(
+            self.client.get("/media/images/missing.jpg").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(
+            self.client.get("/media/../manage.py").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(
+            self.client.get("/media/images").status_code, status.HTTP_404_NOT_FOUND
+        )
+
+    def test_staged_uploads_are_not_served(self):
+        default_storage.save("uploads/raw.jpg", io.BytesIO(self.content))
+
+        for path in ("uploads/raw.jpg", "images/../uploads/raw.jpg"):
+            self.assertEqual(
+                self.client.get(f"/media/{path}").status_code,
+                status.HTTP_404_NOT_FOUND,
+            )
+
+    def test_only_safe_methods(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        for i in range(3):
+            outbox.queue_email("Subject", f"Body {i}", [f"user{i}@example.com"])
+
+    def _run_worker(self):
+        call_command("email_worker", "--once", stdout=io.StringIO())
+
+    def test_worker_sends_queued_emails_over_one_connection(self):
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.open"
+        ) as open_connection:
+            self._run_worker()
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertFalse(
+            OutgoingEmail.objects.exclude(status=OutgoingEmail.Status.SENT).exists()
+        )
+
+        self._run_worker()
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=smtplib.SMTPServerDisconnected("down"),
+        ):
+            self._run_worker()
+
+        email = OutgoingEmail.objects.order_by("id").first()
+        self.assertEqual(email.status, OutgoingEmail.Status.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn("down", email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        # Not due yet
+        self._run_worker()
+        self.assertEqual(len(mail.outbox), 0)
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self._run_worker()
+        self.assertEqual(len(mail.outbox), 3)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.Status.SENT)
+        self.assertEqual(email.attempts, 2)
+
+    def test_retry_delay_grows_exponentially(self):
+        self.assertEqual(outbox.retry_delay(1), outbox.RETRY_DELAY)
+        self.assertEqual(outbox.retry_delay(3), outbox.RETRY_DELAY * 4)
+        self.assertEqual(outbox.retry_delay(30), outbox.MAX_RETRY_DELAY)
+
+    def test_gives_up_after_max_attempts(self):
+        OutgoingEmail.objects.update(attempts=outbox.MAX_ATTEMPTS - 1)
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.open",
+            side_effect=OSError("connection refused"),
+        ):
+            self._run_worker()
+
+        self.assertEqual(
+            OutgoingEmail.objects.filter(status=OutgoingEmail.Status.FAILED).count(), 3
+        )
+
+
+class BulkMailCommandTests(TestCase):
+    def setUp(self):
+        for name in ("Cogito", "Web"):
+            Project.objects.create(name=name, description=name, hours_a_week=5)
+        self.applications = [
+            MemberApplication.objects.create(
+                first_name=name,
+                last_name="Nordmann",
+                email=f"{name.lower()}@example.com",
+                phone_number="12345678",
+                lead=lead,
+                projects_to_join=projects,
+            )
+            for name, lead, projects in (
+                ("Ola", True, ["Cogito"]),
+                ("Kari", False, ["Cogito", "Web"]),
+                ("Per", True, ["Web"]),
+            )
+        ]
+
+    def _bulk_mail(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command("bulk_mail", *args, "--rate", "0", stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_sends_rendered_template_to_filtered_applicants(self):
+        out, _ = self._bulk_mail(
+            "interview_invite", "--lead", "--context", "when=on Monday"
+        )
+
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            ["ola@example.com", "per@example.com"],
+        )
+        self.assertEqual(
+            mail.outbox[0].subject, "Interview invitation from Cogito NTNU"
+        )
+        self.assertIn("Dear Ola Nordmann", mail.outbox[0].body)
+        self.assertIn("interview on Monday", mail.outbox[0].body)
+        self.assertIn("Sent 2 of 2 emails", out)
+
+    def test_plain_text_is_not_html_escaped(self):
+        application = self.applications[0]
+        application.last_name = "O'Brien"
+        application.save()
+
+        self._bulk_mail(
+            "acceptance", "--id", str(application.pk), "--context", "project=R&D <AI>"
+        )
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Dear Ola O'Brien,", mail.outbox[0].body)
+        self.assertIn("will be joining R&D <AI>.", mail.outbox[0].body)
+        self.assertTrue(mail.outbox[0].body.endswith("Cogito NTNU\n"))
+
+    def test_project_and_id_filters(self):
+        self._bulk_mail("acceptance", "--project", "Web", "--no-lead")
+        self.assertEqual([m.to[0] for m in mail.outbox], ["kari@example.com"])
+
+        mail.outbox = []
+        self._bulk_mail("acceptance", "--id", str(self.applications[2].id))
+        self.assertEqual([m.to[0] for m in mail.outbox], ["per@example.com"])
+
+    def test_reuses_connection_for_each_batch(self):
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.open"
+        ) as open_connection:
+            self._bulk_mail("acceptance", "--batch-size", "2")
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(open_connection.call_count, 2)
+
+    def test_failures_are_reported_per_recipient(self):
+        send_messages = locmem.EmailBackend.send_messages
+
+        def refuse_kari(backend, messages):
+            if messages[0].to == ["kari@example.com"]:
+                raise smtplib.SMTPRecipientsRefused({"kari@example.com": (550, b"")})
+            return send_messages(backend, messages)
+
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            refuse_kari,
+        ):
+            out, err = self._bulk_mail("acceptance")
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn("Sent 2 of 3 emails", out)
+        self.assertIn("Failed to send to kari@example.com", err)
+
+    def test_rate_limit(self):
+        with mock.patch("team.mailing.time.sleep") as sleep:
+            call_command("bulk_mail", "acceptance", "--rate", "1", stdout=io.StringIO())
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_dry_run_sends_nothing(self):
+        out, _ = self._bulk_mail("acceptance", "--dry-run")
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertIn("Would send 3 emails", out)
+        self.assertIn("Dear Ola Nordmann", out)
+
+    def test_unknown_template(self):
+        with self.assertRaises(CommandError):
+            self._bulk_mail("no_such_template")
+
+
+@override_settings(
+    EMAIL_BACKEND="cogito.mail.CircuitBreakerEmailBackend",
+    EMAIL_CIRCUIT_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    EMAIL_CIRCUIT_FAILURE_THRESHOLD=2,
+    EMAIL_CIRCUIT_COOLDOWN=60,
+)
+class EmailCircuitBreakerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _send(self):
+        return mail.send_mail("Subject", "Body", None, ["user@example.com"])
+
+    def _smtp_down(self):
+        return mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=smtplib.SMTPServerDisconnected("down"),
+        )
+
+    def test_sends_through_the_wrapped_backend(self):
+        self.assertEqual(self._send(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(cogito_mail.state()["state"], "closed")
+
+    @override_settings(
+        EMAIL_CIRCUIT_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+        EMAIL_TIMEOUT=7,
+    )
+    def test_smtp_timeout(self):
+        backend = mail.get_connection()
+        self.assertEqual(backend.backend.timeout, 7)
+
+    def test_opens_after_repeated_failures(self):
+        with self._smtp_down() as send_messages:
+            for _ in range(2):
+                with self.assertRaises(smtplib.SMTPServerDisconnected):
+                    self._send()
+            self.assertEqual(cogito_mail.state()["state"], "open")
+
+            # Fails fast without contacting the server
+            with self.assertRaises(cogito_mail.CircuitOpen):
+                self._send()
+            self.assertEqual(send_messages.call_count, 2)
+
+    def test_closes_after_successful_attempt_once_cooled_down(self):
+        with self._smtp_down():
+            for _ in range(2):
+                with self.assertRaises(smtplib.SMTPServerDisconnected):
+                    self._send()
+
+        cache.set(cogito_mail.OPEN_UNTIL_KEY, time.time() - 1, timeout=None)
+        self.assertEqual(cogito_mail.state()["state"], "half-open")
+        self._send()
+        self.assertEqual(cogito_mail.state()["state"], "closed")
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failure_while_half_open_reopens(self):
+        cache.set(cogito_mail.OPEN_UNTIL_KEY, time.time() - 1, timeout=None)
+        with self._smtp_down():
+            with self.assertRaises(smtplib.SMTPServerDisconnected):
+                self._send()
+        self.assertEqual(cogito_mail.state()["state"], "open")
+
+    def test_half_open_lets_a_single_probe_through(self):
+        cache.set(cogito_mail.OPEN_UNTIL_KEY, time.time() - 1, timeout=None)
+        # Another process is probing the server
+        cogito_mail.check()
+
+        with self.assertRaises(cogito_mail.CircuitOpen) as raised:
+            self._send()
+        self.assertGreater(raised.exception.open_until, time.time())
+        self.assertEqual(len(mail.outbox), 0)
+
+        # The probe fails, and the circuit opens again for everyone
+        cogito_mail.record_failure()
+        self.assertEqual(cogito_mail.state()["state"], "open")
+        with self.assertRaises(cogito_mail.CircuitOpen):
+            self._send()
+
+        # After the next cooldown the probe is free again
+        cache.set(cogito_mail.OPEN_UNTIL_KEY, time.time() - 1, timeout=None)
+        self._send()
+        self.assertEqual(cogito_mail.state()["state"], "closed")
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_refused_recipient_ends_the_probe(self):
+        cache.set(cogito_mail.OPEN_UNTIL_KEY, time.time() - 1, timeout=None)
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=smtplib.SMTPRecipientsRefused({}),
+        ):
+            with self.assertRaises(smtplib.SMTPRecipientsRefused):
+                self._send()
+
+        self.assertEqual(cogito_mail.state()["state"], "closed")
+        self.assertEqual(self._send(), 1)
+
+    def test_refused_recipients_do_not_count(self):
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=smtplib.SMTPRecipientsRefused({}),
+        ):
+            for _ in range(3):
+                with self.assertRaises(smtplib.SMTPRecipientsRefused):
+                    self._send()
+        self.assertEqual(cogito_mail.state()["state"], "closed")
+
+    def test_outbox_waits_for_the_circuit_without_using_attempts(self):
+        email = outbox.queue_email("Subject", "Body", ["user@example.com"])
+        cache.set(cogito_mail.OPEN_UNTIL_KEY, time.time() + 60, timeout=None)
+
+        call_command("email_worker", "--once", stdout=io.StringIO())
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.Status.PENDING)
+        self.assertEqual(email.attempts, 0)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_health_check_shows_circuit_state(self):
+        response = self.client.get(f"{base}health-check/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b"Email circuit: closed", response.content)
+
+        cache.set(cogito_mail.OPEN_UNTIL_KEY, time.time() + 60, timeout=None)
+        response = self.client.get(f"{base}health-check/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b"Email circuit: open", response.content)
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        "DEFAULT_THROTTLE_RATES": {"apply_ip": "3/hour", "apply_email": "2/hour"}
+    }
+)
+class ApplyThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.url = f"{base}apply/"
+
+    def _apply(self, email, ip="10.0.0.1", **headers):
+        payload = {
+            "first_name": "John",
+            "last_name": "Doe",
+            "email": email,
+            "phone_number": "1234567890",
+        }
+        return self.client.post(
+            self.url,
+            payload,
+            content_type="application/json",
+            REMOTE_ADDR=ip,
+            **headers,
+        )
+
+    def test_idempotent_replays_are_free(self):
+        self._apply("john@example.com", HTTP_IDEMPOTENCY_KEY="abc")
+        for _ in range(5):
+            response = self._apply("john@example.com", HTTP_IDEMPOTENCY_KEY="abc")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["Idempotent-Replayed"], "true")
+
+        # Only the stored application used a token of either bucket
+        self.assertEqual(
+            self._apply("john@example.com", HTTP_IDEMPOTENCY_KEY="def").status_code,
+            status.HTTP_200_OK,
+        )
+        self.assertEqual(
+            self._apply("other@example.com").status_code, status.HTTP_200_OK
+        )
+        self.assertEqual(
+            self._apply("last@example.com").status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+
+    def test_throttles_per_email(self):
+        for _ in range(2):
+            self.assertEqual(
+                self._apply("Spam@example.com").status_code, status.HTTP_200_OK
+            )
+        response = self._apply(" spam@example.com", ip="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+
+        self.assertEqual(
+            self._apply("other@example.com", ip="10.0.0.3").status_code,
+            status.HTTP_200_OK,
+        )
+
+    def test_throttles_per_ip(self):
+        for i in range(3):
+            self.assertEqual(
+                self._apply(f"user{i}@example.com").status_code, status.HTTP_200_OK
+            )
+        self.assertEqual(
+            self._apply("user3@example.com").status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        self.assertEqual(
+            self._apply("user3@example.com", ip="10.0.0.2").status_code,
+            status.HTTP_200_OK,
+        )
+
+    def test_rejected_before_any_database_work(self):
+        for i in range(3):
+            self._apply(f"user{i}@example.com")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._apply("not an email")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(MemberApplication.objects.count(), 3)
+        self.assertEqual(OutgoingEmail.objects.count(), 3)
+
+    def test_bucket_refills_over_time(self):
+        with mock.patch("team.throttling.time.time", return_value=1000.0):
+            for i in range(3):
+                self._apply(f"user{i}@example.com")
+            self.assertEqual(
+                self._apply("user3@example.com").status_code,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+        # One token comes back every 20 minutes at 3/hour
+        with mock.patch("team.throttling.time.time", return_value=1000.0 + 1200):
+            self.assertEqual(
+                self._apply("user3@example.com").status_code, status.HTTP_200_OK
+            )
+            self.assertEqual(
+                self._apply("user4@example.com").status_code,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+
+    def test_throttled_requests_are_counted(self):
+        for i in range(5):
+            self._apply(f"user{i}@example.com")
+
+        out = io.StringIO()
+        call_command("throttle_stats", "--reset", stdout=out)
+        self.assertIn("apply_ip: 2 rejected", out.getvalue())
+        self.assertIn("apply_email: 0 rejected", out.getvalue())
+        self.assertEqual(throttling.stats()["apply_ip"], 0)
+
+
+class MemberCategoryViewTests(TestCase):
     def setUp(self):
         self.client = Client()
         self.url = f"{base}member/category"
@@ -622,11 +2701,80 @@ class MemberCategoryViewTests(TestCase):
         response = self.client.get(self.url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_member_categories_include_member_counts(self):
+        cache.clear()
+        styret = MemberCategory.objects.create(title="Styret")
+        MemberCategory.objects.create(title="Empty")
+        alice = Member.objects.create(order=1, name="Alice")
+        alice.category.set([styret])
+        Member.objects.create(order=2, name="Bob").category.set([styret])
+
+        # the annotated categories only
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        categories = {c["title"]: c for c in response.json()}
+        self.assertEqual(categories["Styret"]["member_count"], 2)
+        self.assertIsNotNone(categories["Styret"]["updated_at"])
+        self.assertEqual(categories["Empty"]["member_count"], 0)
+        self.assertIsNone(categories["Empty"]["updated_at"])
+
+    def test_member_count_changes_are_not_modified_since(self):
+        cache.clear()
+        styret = MemberCategory.objects.create(title="Styret")
+        alice = Member.objects.create(order=1, name="Alice")
+        with mock.patch("team.caching.time.time", return_value=1_700_000_000):
+            caching.invalidate()
+            first = self.client.get(self.url)
+
+        # Changes member_count without touching any updated_at
+        alice.category.set([styret])
+        second = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
 
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.json()[0]["member_count"], 1)
 
-class ImportDataCommandTest(TestCase):
 
+class BenchmarkCommandTests(TestCase):
+    def _run(self, *args) -> str:
+        out = io.StringIO()
+        call_command("benchmark", *args, "--sizes", "10", "--repeat", "1", stdout=out)
+        return out.getvalue()
+
+    def test_member_listing_next_to_real_members(self):
+        Member.objects.create(order=5, name="Alice", title="CEO")
+
+        self.assertIn("10 members", self._run("member_listing"))
+        # The generated data is rolled back
+        self.assertEqual(list(Member.objects.values_list("name", flat=True)), ["Alice"])
+
+    def test_member_images_next_to_real_members(self):
+        Member.objects.create(order=5, name="Alice", title="CEO")
+
+        self.assertIn("10 images", self._run("member_images"))
+
+    def test_application_filters_update_only_generated_applications(self):
+        application = MemberApplication.objects.create(
+            first_name="Kari",
+            last_name="Nordmann",
+            email="kari@example.com",
+            phone_number="12345678",
+            about="-",
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIn("10 applications", self._run("application_filters"))
+
+        (update,) = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        updated = [int(i) for i in re.search(r"ARRAY\[(.*?)\]", update)[1].split(",")]
+        self.assertEqual(len(updated), 10)
+        self.assertNotIn(application.pk, updated)
+
+
+class ImportDataCommandTest(TestCase):
     def setUp(self):
         # Create a temp file for JSON data
         self.file_path = "test.json"
@@ -682,6 +2830,8 @@ class ImportDataCommandTest(TestCase):
 
 class SQLInjectionTestCase(TestCase):
     def setUp(self):
+        # The throttle buckets live in the cache
+        cache.clear()
         self.client = Client()
         self.url = f"{base}apply/"
 
@@ -0,0 +1,129 @@
+"""
+Token bucket throttling for the public endpoints.
+
+Every client gets a bucket of `n` tokens for a rate of "n/period", refilled
+continuously at n tokens per period; a request takes one token and is answered
+with 429 when the bucket is empty. Unlike a fixed window this allows short
+bursts but no sustained flood. A bucket is a single (tokens, timestamp) cache
+entry, and DRF checks throttles before the view runs, so a rejected request
+costs no database work.
+
+A retry that replays a stored application (see team/idempotency.py) is free,
+so retrying with the same Idempotency-Key does not use up the applicant's
+tokens. Only requests with the header pay for that lookup.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from rest_framework.exceptions import ParseError
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from . import idempotency
+
+THROTTLED_KEY = "throttle:rejected:{scope}"
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_rate(rate: str) -> tuple:
+    """Parse a rate like "10/hour" into (10, 3600)"""
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Subclasses set `scope` to a key of DEFAULT_THROTTLE_RATES, and override
+    get_ident() to throttle on something other than the client IP.
+    """
+
+    scope = None
+
+    def allow_request(self, request, view):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        ident = self.get_ident(request)
+        if rate is None or ident is None or self.is_replay(request):
+            return True
+
+        capacity, period = parse_rate(rate)
+        refill = capacity / period
+        key = f"throttle:{self.scope}:{ident}"
+        now = time.time()
+
+        tokens, last = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * refill)
+        if tokens < 1:
+            self._wait = (1 - tokens) / refill
+            count_throttled(self.scope)
+            return False
+
+        # A bucket that is left alone is full again after one period
+        cache.set(key, (tokens - 1, now), timeout=period)
+        return True
+
+    def wait(self):
+        return getattr(self, "_wait", None)
+
+    def is_replay(self, request) -> bool:
+        """Whether the request only replays a stored response, and is free"""
+        return False
+
+
+class ApplyThrottle(TokenBucketThrottle):
+    def is_replay(self, request) -> bool:
+        # Looked up once per request, for all the throttles of the view
+        if not hasattr(request, "_idempotent_replay"):
+            key = request.headers.get(idempotency.HEADER)
+            request._idempotent_replay = (
+                bool(key) and idempotency.find_key(key) is not None
+            )
+        return request._idempotent_replay
+
+
+class ApplyIPThrottle(ApplyThrottle):
+    """Limits applications per client IP"""
+
+    scope = "apply_ip"
+
+
+class ApplyEmailThrottle(ApplyThrottle):
+    """Limits applications per applicant email address"""
+
+    scope = "apply_email"
+
+    def get_ident(self, request):
+        try:
+            email = request.data.get("email")
+        except (ParseError, AttributeError):
+            return None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        # Hashed, as cache keys must not contain arbitrary characters
+        return hashlib.md5(email.strip().lower().encode()).hexdigest()
+
+
+def count_throttled(scope: str) -> None:
+    key = THROTTLED_KEY.format(scope=scope)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def stats() -> dict:
+    """{scope: number of rejected requests}"""
+    return {
+        scope: cache.get(THROTTLED_KEY.format(scope=scope), 0)
+        for scope in api_settings.DEFAULT_THROTTLE_RATES
+    }
+
+
+def reset_stats() -> None:
+    cache.delete_many(
+        [THROTTLED_KEY.format(scope=s) for s in api_settings.DEFAULT_THROTTLE_RATES]
+    )
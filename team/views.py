@@ -1,23 +1,44 @@
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
 
 # Create your views here.
-from django.core.mail import send_mail
 from django.conf import settings
-from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework.permissions import AllowAny
 from rest_framework import permissions
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework import status
 from rest_framework.views import APIView
-from .models import Member, MemberApplication, MemberCategory, Project
+from . import (
+    analytics,
+    caching,
+    exports,
+    fast_serializers,
+    idempotency,
+    jobs,
+    outbox,
+    pagination,
+)
+from .models import ImageJob, Member, MemberApplication, MemberCategory, Project
+from .throttling import ApplyEmailThrottle, ApplyIPThrottle
 from .serializers import (
+    ImageJobSerializer,
     MemberCategorySerializer,
     MemberImageUploadSerializer,
     MemberSerializer,
     FindMemberSerializer,
+    FindMembersByCategoriesSerializer,
     MemberApplicationSerializer,
+    ExportApplicationsSerializer,
+    FindApplicationsSerializer,
+    SeasonSerializer,
+    SparseFieldsetSerializer,
+    requested_fields,
     ProjectSerializer,
 )
 from rest_framework.response import Response
@@ -37,38 +58,149 @@ member_error_response = openapi.Response(
 )
 
 
+# Members are paged on their display order, which is also their primary key
+MEMBER_PAGE_ORDER = ("order",)
+
+
 @swagger_auto_schema(
     method="GET",
     query_serializer=FindMemberSerializer,
-    operation_description="Get members with the specified category, for retrieval of all members set it to 'Alle Medlemmer' ",
+    operation_description="Get members with the specified category, for retrieval of all members set it to 'Alle Medlemmer'. Pass 'limit' and/or 'cursor' to get them one page at a time",
     tags=["Member Management"],
     response_description="Returns the members wished upon the request",
     responses={200: member_success_response, 400: member_error_response},
 )
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
-def get_members(request) -> JsonResponse:
+def get_members(request) -> HttpResponse:
     """Returns the members wished upon the request"""
     try:
         member_type: str = request.query_params.get("member_type")
-        if member_type == "Alle Medlemmer":
-            members = Member.objects.all()
-        else:
-            members = Member.objects.filter(category__title=member_type)
-        serializer = MemberSerializer(members, many=True)
+        requested = requested_fields(request)
+        rendered = MemberSerializer.rendered_fields(**requested)
+
+        members = Member.objects.all()
+        if member_type != "Alle Medlemmer":
+            members = members.filter(category__title=member_type)
+
+        page = None
+        if pagination.is_requested(request):
+            try:
+                page = pagination.get_page_params(request, members, MEMBER_PAGE_ORDER)
+            except pagination.InvalidPage as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        def build():
+            # Same output as MemberSerializer, built without the DRF field machinery
+            rows = fast_serializers.member_values(members, rendered)
+            if page is None:
+                return fast_serializers.serialize_members(rows, rendered)
+            rows, next_cursor = pagination.paginate(rows, MEMBER_PAGE_ORDER, *page)
+            return {
+                "results": fast_serializers.serialize_members(rows, rendered),
+                "next": next_cursor,
+            }
 
-        return JsonResponse(serializer.data, safe=False)
+        return caching.cached_json_response(
+            request,
+            "members-by-type",
+            build,
+            member_type=member_type,
+            limit=request.query_params.get("limit"),
+            cursor=request.query_params.get("cursor"),
+            fields=request.query_params.get("fields"),
+            omit=request.query_params.get("omit"),
+        )
 
     except Exception as e:
         response = {"error": e}
         return Response(data=response, status=status.HTTP_400_BAD_REQUEST)
 
 
+members_by_categories_success_response = openapi.Response(
+    description="Members grouped by category. Each member is listed once in 'members', always with its 'order', and referenced by it from 'groups'. Members without a category are left out",
+    examples={
+        "application/json": {
+            "members": [{"order": 1, "name": "Ola Nordmann"}],
+            "groups": {"Styret": [1], "Web Developer": []},
+        }
+    },
+)
+
+
+@swagger_auto_schema(
+    method="GET",
+    query_serializer=FindMembersByCategoriesSerializer,
+    operation_description="Get the members of several categories in one request, or of all categories if 'member_type' is left out",
+    tags=["Member Management"],
+    response_description="Returns the members and the member ids in each category",
+    responses={200: members_by_categories_success_response},
+)
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def get_members_by_categories(request) -> HttpResponse:
+    """Returns members grouped by category, serializing each member once"""
+    member_types = sorted(set(request.query_params.getlist("member_type")))
+    requested = requested_fields(request)
+    rendered = MemberSerializer.rendered_fields(**requested)
+    if "order" not in rendered:
+        # The groups refer to members by it
+        rendered.insert(0, "order")
+
+    # Members without a category are in no group, so they are left out
+    if member_types:
+        members = Member.objects.filter(category__title__in=member_types)
+    else:
+        members = Member.objects.filter(category__isnull=False)
+    members = members.distinct()
+
+    def build():
+        titles = member_types or list(
+            MemberCategory.objects.values_list("title", flat=True)
+        )
+        rows = list(fast_serializers.member_values(members, rendered))
+        categories = fast_serializers.member_categories([r["order"] for r in rows])
+
+        groups = {title: [] for title in titles}
+        for row in rows:
+            for title in categories.get(row["order"], []):
+                if title in groups:
+                    groups[title].append(row["order"])
+
+        return {
+            "members": fast_serializers.serialize_members(
+                rows, rendered, categories=categories
+            ),
+            "groups": groups,
+        }
+
+    return caching.cached_json_response(
+        request,
+        "members-by-categories",
+        build,
+        member_type=member_types,
+        fields=request.query_params.get("fields"),
+        omit=request.query_params.get("omit"),
+    )
+
+
 class MemberCategoryView(APIView):
+    @swagger_auto_schema(
+        operation_description="Get all member categories with their member count and the last time one of their members was updated",
+        tags=["Member Management"],
+        responses={200: MemberCategorySerializer(many=True)},
+    )
     def get(self, request):
-        categories = MemberCategory.objects.all()
-        serializer = MemberCategorySerializer(categories, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def build():
+            # Counted in the same query, so empty tabs can be hidden without
+            # asking for each category's members
+            categories = MemberCategory.objects.annotate(
+                member_count=Count("member"),
+                updated_at=Max("member__updated_at"),
+            )
+            return MemberCategorySerializer(categories, many=True).data
+
+        return caching.cached_json_response(request, "member-categories", build)
 
 
 class UpdateMemberImageView(APIView):
@@ -86,45 +218,57 @@ class UpdateMemberImageView(APIView):
     )
 
     @swagger_auto_schema(
-        operation_description="Update the image of a member",
+        operation_description="Update the image of a member. The images are processed in the background, poll the returned 'status_url' for the result",
         tags=["Member Management"],
         manual_parameters=[image_param],
         responses={
-            200: openapi.Response(description="Files processed successfully"),
+            202: openapi.Response(
+                description="Files queued for processing",
+                examples={
+                    "application/json": {
+                        "job_id": 1,
+                        "status": "pending",
+                        "status_url": "/api/member/image/1",
+                    }
+                },
+            ),
             400: openapi.Response(description="Invalid request data"),
         },
     )
     def post(self, request, *args, **kwargs):
         serializer = MemberImageUploadSerializer(data=request.data)
         if serializer.is_valid():
-            images = serializer.validated_data["images"]
-            updated_members = []
-            members_not_found = []
-
-            for image in images:
-                member_name, file_extension = image.name.rsplit(".", 1)
-
-                try:
-                    member = Member.objects.get(name=member_name)
-                    member.image = image
-                    member.save()
-                    updated_members.append(member)
-                except Member.DoesNotExist:
-                    members_not_found.append(member_name)
-                    continue
+            job = jobs.enqueue_member_images(serializer.validated_data["images"])
 
             response = {
-                "updated_members": MemberSerializer(updated_members, many=True).data,
-                "members_not_found": members_not_found,
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": reverse("Image_job", args=[job.id]),
             }
             return Response(
                 response,
-                status=status.HTTP_200_OK,
+                status=status.HTTP_202_ACCEPTED,
             )
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@swagger_auto_schema(
+    method="GET",
+    operation_description="Get the status of an image upload. When it is 'done', 'result' holds the updated members, the names that matched no member and the files that were not valid images",
+    tags=["Member Management"],
+    responses={
+        200: ImageJobSerializer,
+        404: openapi.Response(description="No such job"),
+    },
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_image_job(request, job_id):
+    job = get_object_or_404(ImageJob, pk=job_id)
+    return Response(ImageJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
 # Apply
 application_success_response = openapi.Response(
     description="Sends an application for membership to Cogito",
@@ -140,38 +284,88 @@ application_error_response = openapi.Response(
 @swagger_auto_schema(
     method="POST",
     request_body=MemberApplicationSerializer,
-    operation_description="Sends in an application to Cogito",
+    operation_description="Sends in an application to Cogito. Sending the same application again, with the same 'Idempotency-Key' header or within a few minutes, returns the original answer without registering it twice",
     tags=["Member Management"],
     response_description="Returns a message confirming that the application has been registered.",
-    responses={200: application_success_response, 400: application_error_response},
+    manual_parameters=[
+        openapi.Parameter(
+            "Idempotency-Key",
+            openapi.IN_HEADER,
+            description="Unique key for this application, reuse it when retrying",
+            type=openapi.TYPE_STRING,
+            required=False,
+        )
+    ],
+    responses={
+        200: application_success_response,
+        400: application_error_response,
+        422: openapi.Response(
+            description="The Idempotency-Key was used for a different application"
+        ),
+        429: openapi.Response(description="Too many applications, try again later"),
+    },
 )
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([ApplyIPThrottle, ApplyEmailThrottle])
 def apply(request):
     """Apply for membership status to the organization"""
 
-    serializer = MemberApplicationSerializer(data=request.data)
-    if serializer.is_valid():
-        application: MemberApplication = serializer.save()
-
-        # Send confirmation email
-        subject = "Application Received by Cogito NTNU"
-        message = f"""Dear {application.first_name} {application.last_name},\n\nThank you for your application. We have received your details and our team will send you future details on Email and/or Phone. \nIf you have any questions, please feel free to contact us at: styre@cogito-ntnu.no\n\nBest regards,\nCogito NTNU """
-        recipient_list = [application.email]
-
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipient_list,
-            fail_silently=False,
+    key = request.headers.get(idempotency.HEADER)
+    if key is not None and not 0 < len(key) <= idempotency.MAX_KEY_LENGTH:
+        return Response(
+            {"error": f"{idempotency.HEADER} must be 1 to 255 characters"},
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-        message = {"message": "Application sent in successfully"}
-        return Response(message, status=status.HTTP_200_OK)
-    else:
+    serializer = MemberApplicationSerializer(data=request.data)
+    if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    payload_hash = idempotency.payload_hash(serializer.validated_data)
+    try:
+        with transaction.atomic():
+            idempotency.lock(payload_hash)
+            if key is not None:
+                original = idempotency.find_key(key)
+            else:
+                original = idempotency.find_recent(payload_hash)
+            if original is None:
+                application = serializer.save(
+                    idempotency_key=key, payload_hash=payload_hash
+                )
+                _queue_confirmation_email(application)
+    except IntegrityError:
+        # The same key was used by a concurrent request
+        original = idempotency.find_key(key)
+
+    if original is not None and original.payload_hash != payload_hash:
+        return Response(
+            {"error": f"{idempotency.HEADER} was used for a different application"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    message = {"message": "Application sent in successfully"}
+    response = Response(message, status=status.HTTP_200_OK)
+    if original is not None:
+        # A resubmission gets the original answer, without storing or emailing again
+        response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _queue_confirmation_email(application: MemberApplication):
+    """Queue the confirmation email, it is sent by the email worker"""
+    subject = "Application Received by Cogito NTNU"
+    message = f"""Dear {application.first_name} {application.last_name},\n\nThank you for your application. We have received your details and our team will send you future details on Email and/or Phone. \nIf you have any questions, please feel free to contact us at: styre@cogito-ntnu.no\n\nBest regards,\nCogito NTNU """
+    recipient_list = [application.email]
+
+    outbox.queue_email(
+        subject=subject,
+        message=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=recipient_list,
+    )
+
 
 # Get applications
 application_success_response = openapi.Response(
@@ -190,19 +384,118 @@ application_success_response = openapi.Response(
 )
 
 
+# Applications are paged oldest first, with the id breaking ties
+APPLICATION_PAGE_ORDER = ("date_of_application", "id")
+
+
 @swagger_auto_schema(
     method="GET",
-    operation_description="Get all applications",
+    query_serializer=FindApplicationsSerializer,
+    operation_description="Get all applications, optionally filtered. With 'q' the best matches come first. Pass 'limit' and/or 'cursor' to get them one page at a time, oldest first",
     tags=["Member Management"],
-    response_description="Returns all applications",
+    response_description="Returns all applications matching the filters",
 )
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_applications(request):
-    """Returns all applications"""
-    applications = MemberApplication.objects.all()
-    serializer = MemberApplicationSerializer(applications, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    """Returns all applications matching the filters"""
+    # A plain dict, as a QueryDict turns a missing boolean into False
+    filters = FindApplicationsSerializer(data=request.query_params.dict())
+    if not filters.is_valid():
+        return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+    applications = _filter_applications(filters.validated_data)
+    if not pagination.is_requested(request):
+        if "q" in filters.validated_data:
+            # Best matches first. Pages keep the date order, for stable cursors
+            applications = applications.order_by(
+                "-search_rank", *APPLICATION_PAGE_ORDER
+            )
+        serializer = MemberApplicationSerializer(applications, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    try:
+        page = pagination.get_page_params(request, applications, APPLICATION_PAGE_ORDER)
+    except pagination.InvalidPage as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows, next_cursor = pagination.paginate(applications, APPLICATION_PAGE_ORDER, *page)
+    response = {
+        "results": MemberApplicationSerializer(rows, many=True).data,
+        "next": next_cursor,
+    }
+    return Response(response, status=status.HTTP_200_OK)
+
+
+def _filter_applications(params):
+    return MemberApplication.objects.filter_by(
+        since=params.get("since"),
+        until=params.get("until"),
+        lead=params.get("lead"),
+        project=params.get("project"),
+        q=params.get("q"),
+    )
+
+
+@swagger_auto_schema(
+    method="GET",
+    query_serializer=ExportApplicationsSerializer,
+    operation_description="Download the applications matching the filters as a CSV or NDJSON file. The file is streamed, so exports of any size start right away",
+    tags=["Member Management"],
+    response_description="The applications, oldest first",
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_applications(request):
+    """Streams the applications matching the filters as a file"""
+    filters = ExportApplicationsSerializer(data=request.query_params.dict())
+    if not filters.is_valid():
+        return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+    applications = _filter_applications(filters.validated_data).order_by(
+        *APPLICATION_PAGE_ORDER
+    )
+    return exports.export_response(applications, filters.validated_data["output"])
+
+
+# Application statistics
+statistics_success_response = openapi.Response(
+    description="Statistics of the applications in a season",
+    examples={
+        "application/json": {
+            "year": 2024,
+            "semester": "FA",
+            "applications": 3,
+            "lead": {"yes": 1, "no": 1, "unknown": 1},
+            "projects": [
+                {"project": "Web", "ranks": [2, 1], "applications": 3},
+            ],
+            "per_day": [{"date": "2024-08-20", "applications": 3}],
+        }
+    },
+)
+
+
+@swagger_auto_schema(
+    method="GET",
+    query_serializer=SeasonSerializer,
+    operation_description="Get statistics of the applications in a season: how many applicants put each project first, second and so on, how many want to lead, and the number of applications per day",
+    tags=["Member Management"],
+    responses={200: statistics_success_response},
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_application_statistics(request):
+    """Returns the application statistics of a season"""
+    season = SeasonSerializer(data=request.query_params)
+    if not season.is_valid():
+        return Response(season.errors, status=status.HTTP_400_BAD_REQUEST)
+    year, semester = analytics.season_of(timezone.now())
+    data, cached = analytics.get(
+        season.validated_data.get("year", year),
+        season.validated_data.get("semester", semester),
+    )
+    response = Response(data, status=status.HTTP_200_OK)
+    response["X-Cache"] = "HIT" if cached else "MISS"
+    return response
 
 
 # Get Projects
@@ -224,6 +517,7 @@ project_success_response = openapi.Response(
 
 @swagger_auto_schema(
     method="GET",
+    query_serializer=SparseFieldsetSerializer,
     operation_description="Get all projects",
     tags=["Project Management"],
     response_description="Returns all projects",
@@ -232,9 +526,20 @@ project_success_response = openapi.Response(
 @api_view(["GET"])
 def get_projects_descriptions(request):
     """Returns all projects"""
-    projects = Project.objects.all()
-    serializer = ProjectSerializer(projects, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    requested = requested_fields(request)
+
+    def build():
+        rendered = ProjectSerializer.rendered_fields(**requested)
+        projects = Project.objects.with_related(rendered)
+        return ProjectSerializer(projects, many=True, **requested).data
+
+    return caching.cached_json_response(
+        request,
+        "projects",
+        build,
+        fields=request.query_params.get("fields"),
+        omit=request.query_params.get("omit"),
+    )
 
 
 # Add Project